@@ -0,0 +1,295 @@
+"""
+  Precomputed comp atlas
+  An offline build step searches the best comps around every single unit and every pair and triple of units sharing
+  a trait, for each team size and Built Different setting, and writes them to one compact file. The file is
+  memory-mapped when opened and holds an inverted index from unit ids to the entries whose core contains them, so a
+  matching query is answered without searching. Queries with bonus traits or other cores fall back to live search.
+
+  Usage: python atlas.py [--output PATH] [--sizes 8 9 10 11] [--max-core 3] [--workers N] [--generations N]
+
+  File layout: MAGIC, the header length (uint32), a JSON header, then the entries, the index offsets and the index
+  postings as little-endian arrays, each aligned on 8 bytes
+"""
+
+import argparse
+import concurrent.futures
+import itertools
+import json
+import os
+import struct
+import time
+
+import numpy as np
+
+from batch import run_spec
+from database import all_units, unique_traits
+from gamedata import GAME_DATA, GameData
+from scoring import PAD, UNIT_NAMES, bonus_key
+from teambuilder import SearchResult, run_search
+
+"""
+    Global Variables
+"""
+# e.g. TFT_ATLAS=atlas.bin, kept next to the result store by default (see resultstore.py)
+ATLAS_PATH = os.environ.get(
+    "TFT_ATLAS", os.path.join(os.path.expanduser("~"), ".tft_planner", "atlas.bin")
+)
+MAGIC = b"TFTATLS1"
+MAX_CORE = 3  # largest core indexed by the atlas
+TOP_K = 10  # comps kept per entry, as many as the UI pages through
+DEFAULT_SIZES = (8, 9, 10, 11)
+STOP_ATLAS = "atlas entry"
+
+
+def entry_dtype(team_width: int, top_k: int) -> np.dtype:
+    """
+    Returns the record type of an atlas entry, unused core and team slots hold the padding unit id PAD
+    """
+    return np.dtype(
+        [
+            ("core", "<i2", (MAX_CORE,)),
+            ("team_size", "u1"),
+            ("bd", "?"),
+            ("count", "u1"),  # comps kept
+            ("generation", "<i4"),
+            ("runtime", "<f4"),
+            ("points", "<i2", (top_k,)),
+            ("teams", "<i2", (top_k, team_width)),
+        ]
+    )
+
+
+def atlas_cores(max_core: int = MAX_CORE) -> list[tuple[str, ...]]:
+    """
+    Returns the cores the atlas is built for: no core, every unit, then every combination of up to max_core units
+    sharing a trait (the cores players build around)
+    """
+    cores = {(): None}
+    cores.update(((name,), None) for name in UNIT_NAMES)
+    for size in range(2, max_core + 1):
+        for t in range(GAME_DATA.scored_traits):
+            names = sorted(GAME_DATA.unit_names[u] for u in GAME_DATA.trait_units[t])
+            cores.update((core, None) for core in itertools.combinations(names, size))
+    return list(cores)
+
+
+def build_specs(
+    sizes: tuple[int, ...] = DEFAULT_SIZES,
+    max_core: int = MAX_CORE,
+    generations: int = 300,
+    population_size: int = 500,
+) -> list[dict]:
+    """
+    Returns the batch search specs (see batch.py) of every atlas entry, seeded by their position
+    Built Different specs skip cores with unique traits, which Built Different excludes
+    """
+    specs = []
+    for core in atlas_cores(max_core):
+        unique = any(trait in unique_traits for name in core for trait in all_units[name].traits)
+        for team_size, bd in itertools.product(sizes, (False, True)):
+            if len(core) < team_size and not (bd and unique):
+                specs.append(
+                    {
+                        "id": len(specs),
+                        "core": list(core),
+                        "team_size": team_size,
+                        "bd": bd,
+                        "generations": generations,
+                        "population_size": population_size,
+                        "top_k": TOP_K,
+                        "seed": len(specs),
+                    }
+                )
+    return specs
+
+
+def write_atlas(path: str, specs: list[dict], results: list[dict]):
+    """
+    Writes the batch results of specs (in the same order) as an atlas file, skipping failed searches
+    The file is replaced atomically, so processes reading the old atlas are not disturbed
+    """
+    done = [(spec, result) for spec, result in zip(specs, results) if "error" not in result]
+    team_width = max((spec["team_size"] for spec, _ in done), default=0)
+    entries = np.zeros(len(done), dtype=entry_dtype(team_width, TOP_K))
+    entries["core"] = entries["teams"] = PAD
+    postings = [[] for _ in range(PAD + 1)]  # unit id -> entries, PAD for entries without a core
+    for i, (spec, result) in enumerate(done):
+        core = sorted(all_units[name].id for name in spec["core"])
+        entry = entries[i]
+        entry["core"][: len(core)] = core
+        entry["team_size"], entry["bd"] = spec["team_size"], spec["bd"]
+        entry["count"] = len(result["teams"])
+        entry["generation"], entry["runtime"] = result["generation"], result["runtime"]
+        for j, team in enumerate(result["teams"]):
+            entry["points"][j] = team["points"]
+            entry["teams"][j, : len(team["team"])] = [all_units[name].id for name in team["team"]]
+        for unit_id in core or [PAD]:
+            postings[unit_id].append(i)
+    offsets = np.cumsum([0] + [len(entry_ids) for entry_ids in postings], dtype="<i4")
+    index = np.array([i for entry_ids in postings for i in entry_ids], dtype="<i4")
+
+    header = json.dumps(
+        {
+            "data": [GAME_DATA.name, GAME_DATA.version],
+            "team_width": team_width,
+            "top_k": TOP_K,
+            "entries": len(entries),
+            "postings": len(index),
+        }
+    ).encode()
+    with open(path + ".tmp", "wb") as file:
+        file.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for array in (entries, offsets, index):
+            file.write(b"\0" * (-file.tell() % 8))
+            file.write(array.tobytes())
+    os.replace(path + ".tmp", path)
+
+
+class Atlas:
+    """
+    Read-only view of an atlas file, memory-mapped so that workers share its pages
+    Raises ValueError if the file is not an atlas of the active data pack
+    """
+
+    def __init__(self, path: str = ATLAS_PATH):
+        self.path = path
+        with open(path, "rb") as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not an atlas file")
+            (length,) = struct.unpack("<I", file.read(4))
+            header = json.loads(file.read(length))
+        if header["data"] != [GAME_DATA.name, GAME_DATA.version]:
+            raise ValueError(f"{path} was built for another data pack")
+        self.pack = header["data"]
+        offset = len(MAGIC) + 4 + length
+        arrays = []
+        for dtype, count in (
+            (entry_dtype(header["team_width"], header["top_k"]), header["entries"]),
+            (np.dtype("<i4"), PAD + 2),
+            (np.dtype("<i4"), header["postings"]),
+        ):
+            offset += -offset % 8
+            # np.memmap rejects empty arrays
+            arrays.append(
+                np.memmap(path, dtype, "r", offset, (count,)) if count else np.zeros(0, dtype)
+            )
+            offset += dtype.itemsize * count
+        self.entries, self.offsets, self.postings = arrays
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(
+        self,
+        bonus_traits: dict[str, int] = None,
+        included_units: list[str] = None,
+        bd: bool = False,
+        team_size: int = 10,
+        top_k: int = 1,
+        data: GameData = GAME_DATA,
+    ) -> SearchResult:
+        """
+        Returns the stored comps of a query as a SearchResult, or None if the atlas has no entry for it (or the
+        query plans for another data pack)
+        Only the entries of the core unit with the fewest entries are compared, so the lookup does not grow with
+        the atlas
+        """
+        if [data.name, data.version] != self.pack:
+            return None
+        if bonus_key(bonus_traits):  # the same rule as the scorers: every scored bonus trait present counts
+            return None
+        if any(name not in all_units for name in included_units or []):
+            return None
+        core = sorted({all_units[name].id for name in included_units or []})
+        if len(core) > MAX_CORE:
+            return None
+        ranges = [(self.offsets[u], self.offsets[u + 1]) for u in core or [PAD]]
+        start, end = min(ranges, key=lambda bounds: bounds[1] - bounds[0])
+        candidates = self.postings[start:end]
+        entries = self.entries[candidates]
+        key = np.full(MAX_CORE, PAD)
+        key[: len(core)] = core
+        match = np.flatnonzero(
+            (entries["core"] == key).all(axis=1)
+            & (entries["team_size"] == team_size)
+            & (entries["bd"] == bool(bd))
+        )
+        if len(match) == 0:
+            return None
+        entry = entries[match[0]]
+        teams = [
+            ([all_units[UNIT_NAMES[u]] for u in entry["teams"][i] if u != PAD], int(entry["points"][i]))
+            for i in range(min(int(entry["count"]), max(top_k, 1)))
+        ]
+        return SearchResult(
+            teams[0][0], teams[0][1], int(entry["generation"]), STOP_ATLAS, float(entry["runtime"]), teams
+        )
+
+
+def open_atlas(path: str = ATLAS_PATH) -> Atlas:
+    """
+    Returns the atlas at path, or None if there is none or it cannot be used
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        return Atlas(path)
+    except ValueError as e:
+        print(f"Atlas not used: {e}")
+        return None
+
+
+def atlas_search(atlas: Atlas, **kwargs) -> SearchResult:
+    """
+    run_search answered from an atlas when it has an entry for the query, takes the same keyword arguments
+    """
+    if atlas is not None:
+        result = atlas.lookup(
+            kwargs.get("bonus_traits"),
+            kwargs.get("included_units"),
+            kwargs.get("bd", False),
+            kwargs.get("team_size", 10),
+            kwargs.get("top_k", 1),
+            kwargs.get("data", GAME_DATA),
+        )
+        if result is not None:
+            return result
+    return run_search(**kwargs)
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1].strip())
+    parser.add_argument("--output", default=ATLAS_PATH, help="atlas file to write")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    parser.add_argument("--max-core", type=int, default=MAX_CORE, choices=range(MAX_CORE + 1))
+    parser.add_argument("--generations", type=int, default=300)
+    parser.add_argument("--population-size", type=int, default=500)
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="number of worker processes"
+    )
+    args = parser.parse_args(argv)
+
+    specs = build_specs(tuple(args.sizes), args.max_core, args.generations, args.population_size)
+    print(f"Building {len(specs)} atlas entries...")
+    start_time = time.time()
+    results = [None] * len(specs)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_spec, spec): spec["id"] for spec in specs}
+        for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:  # skip the failed entry, live search still answers it
+                results[futures[future]] = {"error": f"{type(e).__name__}: {e}"}
+            if done % 100 == 0:
+                print(f"{done} / {len(specs)} entries")
+    if os.path.dirname(args.output):
+        os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    write_atlas(args.output, specs, results)
+    failed = sum("error" in result for result in results)
+    print(
+        f"Wrote {len(specs) - failed} entries to {args.output} ({failed} failed) in {time.time() - start_time:.0f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+  Headless batch comp generation
+  Reads search specs as JSON Lines from a file or stdin, runs them across a worker pool and streams one JSON line per
+  result to stdout as each search finishes. e.g.
+
+    {"id": "honey", "core": ["Nunu", "Veigar"], "bonus_traits": {"Frost": 1}, "bd": false, "team_size": 9,
+     "generations": 500, "time_budget": 5, "top_k": 3, "seed": 1}
+
+  "seed_teams" (lists of unit names) and "synergy_share" warm-start the search, see teambuilder.seed_population.
+  "pack" names the data pack to plan for (packs/<name>.json, default TFT_DATA_PACK, see gamedata.py).
+  Every key is optional. Usage: python batch.py specs.jsonl [--workers N] > results.jsonl
+  With --store PATH, repeated specs return their stored comps (see resultstore.py) unless the spec sets "refine": true
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import functools
+import json
+import os
+import random
+import sys
+
+from database import pack_units
+from gamedata import GAME_DATA, GameData, available_packs, load_pack
+from resultstore import ResultStore, cached_search
+from teambuilder import SYNERGY_SHARE, run_search
+
+
+def spec_pack(spec: dict) -> GameData:
+    """
+    Returns the data pack named by the spec's "pack", the active pack if it has none
+    Raises ValueError for a pack that is not in packs/
+    """
+    name = spec.get("pack")
+    if name is None or name == GAME_DATA.name:
+        return GAME_DATA
+    if name not in available_packs():
+        raise ValueError(f"unknown data pack {name!r}")
+    return load_pack(name)
+
+
+def run_spec(spec: dict, store_path: str = None) -> dict:
+    """
+    Runs the search described by spec and returns a JSON-serializable result
+    store_path - optional ResultStore database shared by the workers
+    """
+    data = spec_pack(spec)
+    # keep stdout for results, run_search reports errors with print
+    with contextlib.redirect_stdout(sys.stderr):
+        if spec.get("seed") is not None:
+            random.seed(spec["seed"])
+        if store_path is None:
+            search = run_search
+        else:
+            search = functools.partial(
+                cached_search, ResultStore(store_path), spec.get("refine", False)
+            )
+        result = search(
+            generations=spec.get("generations", 1000),
+            population_size=spec.get("population_size", 500),
+            bonus_traits=spec.get("bonus_traits"),
+            included_units=spec.get("core"),
+            bd=spec.get("bd", False),
+            team_size=spec.get("team_size", 10),
+            stall_generations=spec.get("stall_generations"),
+            target_score=spec.get("target_score"),
+            time_budget=spec.get("time_budget"),
+            top_k=spec.get("top_k", 1),
+            synergy_share=spec.get("synergy_share", SYNERGY_SHARE),
+            seed_teams=[[pack_units(data)[name] for name in team] for team in spec.get("seed_teams") or []],
+            verbose=False,
+            data=data,
+        )
+    if result is None:
+        return {"id": spec.get("id"), "error": "no team could be generated"}
+    return {
+        "id": spec.get("id"),
+        "team": [unit.name for unit in result.team],
+        "points": result.points,
+        "teams": [
+            {"team": [unit.name for unit in team], "points": points}
+            for team, points in result.teams
+        ],
+        "generation": result.generation,
+        "stop_reason": result.stop_reason,
+        "runtime": result.runtime,
+    }
+
+
+def read_specs(lines) -> tuple[list[dict], list[dict]]:
+    """
+    Parses JSON Lines into specs, skipping blank lines. Specs without an id get their line number
+    Returns the specs and an error result per malformed line, so one bad line does not stop the batch
+    """
+    specs, errors = [], []
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            spec = json.loads(line)
+            if not isinstance(spec, dict):
+                raise ValueError("a search spec must be a JSON object")
+        except ValueError as e:  # json.JSONDecodeError is a ValueError
+            errors.append({"id": number, "error": f"{type(e).__name__}: {e}"})
+            continue
+        spec.setdefault("id", number)
+        specs.append(spec)
+    return specs, errors
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1].strip())
+    parser.add_argument(
+        "specs", nargs="?", default="-", help="JSON Lines file of search specs (default: stdin)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="number of worker processes"
+    )
+    parser.add_argument("--store", help="result store database, see resultstore.py")
+    args = parser.parse_args(argv)
+
+    if args.specs == "-":
+        specs, errors = read_specs(sys.stdin)
+    else:
+        with open(args.specs) as file:
+            specs, errors = read_specs(file)
+    for line in errors:
+        print(json.dumps(line), flush=True)
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(run_spec, spec, args.store): spec for spec in specs}
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                line = future.result()
+            except Exception as e:  # report the failed spec and keep streaming the others
+                line = {"id": futures[future]["id"], "error": f"{type(e).__name__}: {e}"}
+            print(json.dumps(line), flush=True)
+
+
+if __name__ == "__main__":
+    main()
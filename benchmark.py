@@ -0,0 +1,226 @@
+"""
+  Benchmark suite for teambuilder search quality and speed
+  Runs a fixed corpus of scenarios over several seeds and records wall time, generations per second, team evaluations
+  (calculate_points equivalents) per second, peak memory, and the best score compared with the exact optimum.
+  The report is written as JSON and can be compared with a previous report. e.g.
+
+    python benchmark.py --output before.json
+    python benchmark.py --output after.json --compare before.json
+    python benchmark.py --operators tournament --compare before.json
+    python benchmark.py --operators batched_duplicates --compare before.json
+"""
+
+import argparse
+import json
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+
+from scoring import FitnessCache
+from solver import solve_exact
+from teambuilder import BATCHED, GUIDED, TOURNAMENT, TRUNCATION, Operators, run_search
+
+"""
+    Scenario corpus, each scenario holds run_search arguments
+"""
+HONEYMANCY_CORE = [
+    "Kog'Maw",
+    "Jinx",
+    "Nunu",
+    "Olaf",
+    "Veigar",
+    "Twitch",
+    "Ziggs",
+    "Blitzcrank",
+]
+SCENARIOS = {
+    **{f"no_core_{size}": {"team_size": size} for size in range(8, 12)},
+    "honeymancy_core_11": {"included_units": HONEYMANCY_CORE, "team_size": 11},
+    "built_different_10": {"bd": True, "team_size": 10},
+    "bonus_traits_10": {"bonus_traits": {"Frost": 1, "Mage": 1}, "team_size": 10},
+    "core_pair_9": {"included_units": ["Bard", "Rakan"], "team_size": 9},
+}
+DEFAULT_SEEDS = [0, 1, 2]
+REPORT_VERSION = 3
+OPERATORS = {
+    "batched": BATCHED,
+    "batched_duplicates": Operators(batched=True),
+    "truncation": TRUNCATION,
+    "guided": GUIDED,
+    "tournament": TOURNAMENT,
+}
+
+
+def run_once(
+    scenario: dict,
+    seed: int,
+    generations: int,
+    population_size: int,
+    operators: Operators = BATCHED,
+) -> dict:
+    """
+    Runs one seeded search and returns its measurements
+    Peak memory is measured in a second, identical run so that tracing does not skew the timing
+    """
+    best = []  # [(generation, points)] every time the best score improved
+    cache = None if operators.batched else FitnessCache()  # only the list path looks bred teams up
+
+    def progress(generation: int, team: list, points: int):
+        if not best or (points < best[-1][1] if scenario.get("bd") else points > best[-1][1]):
+            best.append((generation, points))
+
+    random.seed(seed)
+    start_time = time.perf_counter()
+    result = run_search(
+        generations=generations,
+        population_size=population_size,
+        progress=progress,
+        progress_interval=1,
+        operators=operators,
+        cache=cache,
+        verbose=False,
+        **scenario,
+    )
+    wall_time = time.perf_counter() - start_time
+
+    random.seed(seed)
+    tracemalloc.start()
+    run_search(
+        generations=generations,
+        population_size=population_size,
+        operators=operators,
+        verbose=False,
+        **scenario,
+    )
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # only the children bred every generation are scored, the elites keep their scores
+    evaluations = result.generation * (population_size - operators.elites(population_size))
+    return {
+        "seed": seed,
+        "points": result.points,
+        "team": [unit.name for unit in result.team],
+        "wall_time": wall_time,
+        "generations": result.generation,
+        "generations_per_sec": result.generation / wall_time,
+        # generation at which the best score was first reached
+        "best_generation": best[-1][0] if best else result.generation,
+        "evaluations": evaluations,
+        "evaluations_per_sec": evaluations / wall_time,
+        # share of bred teams answered by the fitness cache, None if batched
+        "cache_hit_rate": None if cache is None else cache.hit_rate(),
+        "peak_memory": peak_memory,
+    }
+
+
+def run_benchmark(
+    scenarios: dict[str, dict],
+    seeds: list[int],
+    generations: int,
+    population_size: int,
+    operators: str = "batched",
+) -> dict:
+    """
+    Runs every scenario for every seed and returns the report
+    operators - name of the Operators in OPERATORS
+    """
+    report = {
+        "version": REPORT_VERSION,
+        "python": platform.python_version(),
+        "generations": generations,
+        "population_size": population_size,
+        "operators": operators,
+        "seeds": seeds,
+        "scenarios": {},
+    }
+    for name, scenario in scenarios.items():
+        [(_, optimum)] = solve_exact(
+            scenario.get("team_size", 10),
+            scenario.get("bonus_traits"),
+            scenario.get("included_units"),
+            scenario.get("bd", False),
+        )
+        runs = [
+            run_once(scenario, seed, generations, population_size, OPERATORS[operators])
+            for seed in seeds
+        ]
+        report["scenarios"][name] = {
+            "optimum": optimum,
+            "runs": runs,
+            "mean_points": statistics.mean(run["points"] for run in runs),
+            "optimum_rate": sum(run["points"] == optimum for run in runs) / len(runs),
+            "mean_wall_time": statistics.mean(run["wall_time"] for run in runs),
+            "stdev_wall_time": statistics.pstdev(run["wall_time"] for run in runs),
+            "mean_best_generation": statistics.mean(run["best_generation"] for run in runs),
+            "mean_evaluations_per_sec": statistics.mean(
+                run["evaluations_per_sec"] for run in runs
+            ),
+            "max_peak_memory": max(run["peak_memory"] for run in runs),
+        }
+        summary = report["scenarios"][name]
+        print(
+            f"{name}: {summary['mean_points']:.2f} / {optimum} points, "
+            f"best at generation {summary['mean_best_generation']:.1f}, "
+            f"{summary['mean_wall_time']:.3f}s +- {summary['stdev_wall_time']:.3f}s, "
+            f"{summary['mean_evaluations_per_sec']:.0f} evaluations/s, "
+            f"{summary['max_peak_memory'] / 2**20:.1f} MiB"
+        )
+    return report
+
+
+def compare(report: dict, previous: dict):
+    """
+    Prints the change of each scenario against a previous report
+    A speedup is only meaningful if it exceeds the spread between seeds (stdev)
+    """
+    print("\n Compared with previous report \n")
+    for name, summary in report["scenarios"].items():
+        before = previous["scenarios"].get(name)
+        if before is None:
+            print(f"{name}: not in previous report")
+            continue
+        speedup = before["mean_wall_time"] / summary["mean_wall_time"]
+        noise = (before["stdev_wall_time"] + summary["stdev_wall_time"]) / summary[
+            "mean_wall_time"
+        ]
+        print(
+            f"{name}: {speedup:.2f}x speed (noise +-{noise:.0%}), "
+            f"points {before['mean_points']:.2f} -> {summary['mean_points']:.2f}, "
+            f"best at generation {before.get('mean_best_generation', float('nan')):.1f} -> "
+            f"{summary['mean_best_generation']:.1f}, "
+            f"optimum rate {before['optimum_rate']:.0%} -> {summary['optimum_rate']:.0%}"
+        )
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1].strip())
+    parser.add_argument("--generations", type=int, default=1000)
+    parser.add_argument("--population-size", type=int, default=500)
+    parser.add_argument("--seeds", type=int, nargs="+", default=DEFAULT_SEEDS)
+    parser.add_argument(
+        "--scenarios", nargs="+", choices=list(SCENARIOS), help="default: all"
+    )
+    parser.add_argument("--operators", choices=list(OPERATORS), default="batched")
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--compare", help="previous JSON report to compare with")
+    args = parser.parse_args(argv)
+
+    scenarios = {
+        name: SCENARIOS[name] for name in args.scenarios or SCENARIOS
+    }
+    report = run_benchmark(
+        scenarios, args.seeds, args.generations, args.population_size, args.operators
+    )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.compare:
+        with open(args.compare) as file:
+            compare(report, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+  Batched breeding of array-backed populations
+  A population is a 2D integer array of shape (teams, team_size) holding unit ids, each row sorted. A whole generation
+  of children is crossed over and mutated with a few NumPy operations on one-hot (teams, units) masks instead of one
+  Python call per child, and scored in one vectorized pass. Used by teambuilder.evolve for batched Operators.
+  Unit ids, masks and scores follow the data pack of the search (default gamedata.GAME_DATA, see scoring.tables).
+"""
+
+import time
+
+import numpy as np
+
+from database import Unit
+from gamedata import GAME_DATA, GameData
+from scoring import score_population, tables
+
+"""
+    Global Variables
+"""
+# handling of children that duplicate a team of their generation (see teambuilder.Operators)
+DEDUP_REJECT = "reject"  # bred again from other parents
+DEDUP_MUTATE = "mutate"  # mutated
+# times a duplicate child is bred again or mutated before it is kept as is
+DEDUP_ATTEMPTS = 3
+
+
+def to_array(population: list[list[Unit]]) -> np.ndarray:
+    """
+    Returns a population of equally sized teams as an array of sorted unit ids
+    """
+    return np.sort(np.array([[unit.id for unit in team] for team in population], dtype=np.intp), axis=1)
+
+
+def to_teams(teams: np.ndarray, data: GameData = GAME_DATA) -> list[list[Unit]]:
+    """
+    Returns the rows of an array-backed population as lists of Unit objects
+    """
+    units = tables(data).units
+    return [[units[i] for i in row] for row in teams.tolist()]
+
+
+def unit_mask(units: list[Unit], data: GameData = GAME_DATA) -> np.ndarray:
+    """
+    Returns a boolean vector over unit ids, True for the given units
+    """
+    mask = np.zeros(tables(data).pad, dtype=bool)
+    mask[[unit.id for unit in units]] = True
+    return mask
+
+
+def one_hot(teams: np.ndarray, data: GameData = GAME_DATA) -> np.ndarray:
+    """
+    Returns the (teams, units) boolean membership matrix of an array-backed population
+    """
+    members = np.zeros((len(teams), tables(data).pad), dtype=bool)
+    np.put_along_axis(members, teams, True, axis=1)
+    return members
+
+
+def diversity(teams: np.ndarray) -> float:
+    """
+    Returns the share of distinct teams in an array-backed population, like teambuilder.diversity
+    """
+    if len(teams) == 0:
+        return 0.0
+    return len(np.unique(teams, axis=0)) / len(teams)
+
+
+def duplicates(teams: np.ndarray, start: int = 0) -> np.ndarray:
+    """
+    Returns the indices of the rows from start on that repeat an earlier row
+    Teams are compared by their bitmask (see scoring.team_mask) when the unit ids fit in an int64, otherwise by their
+    rows of sorted unit ids as opaque keys
+    """
+    if teams.size == 0 or teams.max() < 64:
+        keys = (np.int64(1) << teams.astype(np.int64)).sum(axis=1)  # unit ids of a team are distinct
+    else:
+        keys = np.ascontiguousarray(teams).view(np.dtype((np.void, teams.dtype.itemsize * teams.shape[1])))
+    repeated = np.ones(len(teams), dtype=bool)
+    repeated[np.unique(keys.ravel(), return_index=True)[1]] = False  # first occurrences
+    return np.flatnonzero(repeated[start:]) + start
+
+
+def crossover(
+    rng: np.random.Generator, first: np.ndarray, second: np.ndarray, rate: float
+) -> np.ndarray:
+    """
+    Returns the one-hot children of pairs of one-hot parents
+    Like teambuilder.crossover a child keeps the units its parents share and fills the other slots with random units
+    of either parent. A child is a copy of its first parent with probability 1 - rate
+    """
+    common = first & second
+    either = first ^ second
+    missing = first.sum(axis=1) - common.sum(axis=1)
+    # rank the units of either parent in random order and keep the first missing ones
+    keys = np.where(either, rng.random(either.shape), 2.0)
+    ranks = np.argsort(np.argsort(keys, axis=1), axis=1)
+    children = common | (ranks < missing[:, None])
+    copies = rng.random(len(children)) >= rate
+    children[copies] = first[copies]
+    return children
+
+
+def mutate(
+    rng: np.random.Generator,
+    children: np.ndarray,
+    rate: float,
+    eligible: np.ndarray,
+    included: np.ndarray,
+):
+    """
+    Replaces in place a random unit (other than included units) of a share rate of the one-hot children with a random
+    eligible unit that is not on the team, like teambuilder.mutate
+    """
+    mutated = np.flatnonzero(rng.random(len(children)) < rate)
+    if len(mutated) == 0:
+        return
+    rows = children[mutated]
+    # the largest random key among the allowed units picks one uniformly, -1 marks rows without a choice
+    removable = np.where(rows & ~included, rng.random(rows.shape), -1.0)
+    addable = np.where(~rows & eligible, rng.random(rows.shape), -1.0)
+    out, into = removable.argmax(axis=1), addable.argmax(axis=1)
+    valid = (removable.max(axis=1) >= 0) & (addable.max(axis=1) >= 0)
+    rows = np.arange(len(mutated))[valid]
+    children[mutated[valid], out[rows]] = False
+    children[mutated[valid], into[rows]] = True
+
+
+def breed(
+    teams: np.ndarray,
+    scores: np.ndarray,
+    parents: np.ndarray,
+    elites: int,
+    bonus_traits: dict[str, int],
+    rates: tuple[float, float],
+    eligible: np.ndarray,
+    included: np.ndarray,
+    rng: np.random.Generator,
+    times: dict[str, float] = None,
+    dedup: str = None,
+    stats: dict[str, int] = None,
+    calls: dict[str, int] = None,
+    data: GameData = GAME_DATA,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the next generation and its scores: the elites (the first rows of a population ranked at its head)
+    followed by the children of the (first, second) parent index pairs
+    rates - (mutation rate, crossover rate)
+    eligible, included - unit masks of the units that can be added by mutation and of the units that are never removed
+    times - optional dict accumulating the seconds spent per phase (for SearchTrace)
+    dedup - None, DEDUP_REJECT or DEDUP_MUTATE, see teambuilder.Operators
+    stats - optional dict accumulating the children that duplicated a team ("duplicates") and those still duplicates
+    after DEDUP_ATTEMPTS ("unresolved")
+    calls - optional Counter of the vectorized crossover, mutate, duplicates and score_population calls made (each
+    handles a whole batch of children)
+    data - data pack of the teams
+    """
+    mutation_rate, crossover_rate = rates
+    if times is not None:
+        start = time.perf_counter()
+    members = one_hot(teams, data)
+    children = crossover(rng, members[parents[:, 0]], members[parents[:, 1]], crossover_rate)
+    if times is not None:
+        crossed = time.perf_counter()
+    mutate(rng, children, mutation_rate, eligible, included)
+    if calls is not None:
+        calls["crossover"] += 1
+        calls["mutate"] += 1
+    # every row holds team_size units, so the column indices of the set bits are the sorted unit ids
+    children = np.nonzero(children)[1].reshape(len(children), teams.shape[1])
+    if dedup is not None or stats is not None:
+        # duplicates are replaced before scoring, so every evaluation is spent on a new team
+        repeated = duplicates(np.concatenate([teams[:elites], children]), elites) - elites
+        if calls is not None:
+            calls["duplicates"] += 1
+        if stats is not None:
+            stats["duplicates"] += len(repeated)
+        for _ in range(DEDUP_ATTEMPTS if dedup is not None else 0):
+            if len(repeated) == 0:
+                break
+            if dedup == DEDUP_REJECT:
+                # pair the first parent of a random pair with the second parent of another
+                pairs = parents[rng.integers(len(parents), size=(len(repeated), 2)), [0, 1]]
+                redone = crossover(rng, members[pairs[:, 0]], members[pairs[:, 1]], crossover_rate)
+                mutate(rng, redone, mutation_rate, eligible, included)
+                if calls is not None:
+                    calls["crossover"] += 1
+            else:
+                redone = one_hot(children[repeated], data)
+                mutate(rng, redone, 1.0, eligible, included)
+            children[repeated] = np.nonzero(redone)[1].reshape(len(repeated), teams.shape[1])
+            repeated = duplicates(np.concatenate([teams[:elites], children]), elites) - elites
+            if calls is not None:
+                calls["mutate"] += 1
+                calls["duplicates"] += 1
+        if stats is not None:
+            stats["unresolved"] += len(repeated)
+    if times is not None:
+        mutated = time.perf_counter()
+    child_scores = score_population(children, bonus_traits, data)
+    if calls is not None:
+        calls["score_population"] += 1
+    if times is not None:
+        times["crossover_time"] += crossed - start
+        times["mutate_time"] += mutated - crossed
+        times["delta_time"] += time.perf_counter() - mutated
+    return (
+        np.concatenate([teams[:elites], children]),
+        np.concatenate([scores[:elites], child_scores]),
+    )
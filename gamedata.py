@@ -0,0 +1,183 @@
+"""
+  Compiled, indexed game data model loaded from versioned data packs
+  A data pack (packs/<name>.json) holds one set's units, costs, traits, breakpoints, unique traits and icon paths.
+  Units and traits get dense integer ids (traits with breakpoints first, then unique traits) along with index tables for
+  unit -> traits, trait -> units and breakpoints, so hot loops index tuples instead of hashing names.
+  Packs are loaded lazily, once per process, and the compiled model is cached with marshal in a compact binary index
+  next to the pack (packs/<name>.cache) so loading a pack again does not re-parse it.
+  ACTIVE_PACK is the default pack of database.py and the search modules, which also take any pack returned by load_pack,
+  so one process (e.g. the server) can plan for several sets.
+"""
+
+import functools
+import json
+import marshal
+import os
+
+"""
+    Global Variables
+"""
+PACKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "packs")
+# pack used by database.py and the modules built on it, e.g. TFT_DATA_PACK=set12
+ACTIVE_PACK = os.environ.get("TFT_DATA_PACK", "set12")
+# supported pack file format
+PACK_FORMAT = 1
+# bump when the layout of GameData changes so old cache files are rebuilt
+CACHE_FORMAT = 3
+
+
+class GameData:
+    """
+    Index tables of one data pack, every table is a tuple indexed by unit or trait id
+    unit_traits[u] - trait ids of unit u (including unique traits)
+    trait_units[t] - unit ids holding trait t
+    breakpoints[t] - breakpoints of trait t, empty for unique traits
+    points_table[t][c] - number of breakpoints of trait t reached with c units (scored traits only)
+    next_breakpoints[t][c] - next breakpoint of trait t after c units, or its last one (scored traits only)
+    icons - {"champions": icon directory, "traits": icon directory} relative to the app
+    """
+
+    __slots__ = (
+        "name",
+        "version",
+        "title",
+        "icons",
+        "unit_names",
+        "unit_costs",
+        "trait_names",
+        "scored_traits",
+        "unit_traits",
+        "trait_units",
+        "breakpoints",
+        "max_count",
+        "points_table",
+        "next_breakpoints",
+        "unit_ids",
+        "trait_ids",
+    )
+    # fields stored in the cache file, the name -> id dicts are rebuilt on load
+    STORED = __slots__[:-2]
+
+    def __init__(self, *fields):
+        for name, value in zip(self.STORED, fields):
+            setattr(self, name, value)
+        self.unit_ids = {name: i for i, name in enumerate(self.unit_names)}
+        self.trait_ids = {name: i for i, name in enumerate(self.trait_names)}
+
+    def dump(self, stamp: tuple) -> bytes:
+        """
+        Returns the binary index, stamp identifies the pack file it was built from
+        """
+        return marshal.dumps(
+            (CACHE_FORMAT, stamp, tuple(getattr(self, name) for name in self.STORED))
+        )
+
+    @classmethod
+    def loads(cls, data: bytes, stamp: tuple) -> "GameData":
+        """
+        Returns the game data of a binary index, raises ValueError if it is stale
+        """
+        cache_format, cache_stamp, fields = marshal.loads(data)
+        if cache_format != CACHE_FORMAT or tuple(cache_stamp) != stamp:
+            raise ValueError("stale game data cache")
+        return cls(*fields)
+
+
+def pack_path(name: str) -> str:
+    return os.path.join(PACKS_DIR, f"{name}.json")
+
+
+def available_packs() -> list[str]:
+    """
+    Returns the names of the data packs in PACKS_DIR
+    """
+    return sorted(
+        file[: -len(".json")] for file in os.listdir(PACKS_DIR) if file.endswith(".json")
+    )
+
+
+def build(pack: dict) -> GameData:
+    """
+    Compiles a parsed data pack
+    Unit ids follow the order of the pack's units
+    """
+    if pack.get("format") != PACK_FORMAT:
+        raise ValueError(f"unsupported data pack format {pack.get('format')}")
+    unit_names = tuple(pack["units"])
+    unit_ids = {name: i for i, name in enumerate(unit_names)}
+    trait_names = tuple(pack["traits"]) + tuple(pack["unique_traits"])
+    scored_traits = len(pack["traits"])
+
+    trait_units = tuple(
+        tuple(unit_ids[unit] for unit in pack["traits"][trait]["units"])
+        for trait in trait_names[:scored_traits]
+    ) + tuple((unit_ids[unit],) for unit in pack["unique_traits"].values())
+    unit_traits = tuple(
+        tuple(t for t in range(len(trait_names)) if u in trait_units[t])
+        for u in range(len(unit_names))
+    )
+    breakpoints = tuple(
+        tuple(pack["traits"][trait]["breakpoints"]) for trait in trait_names[:scored_traits]
+    ) + ((),) * len(pack["unique_traits"])
+    # a trait can be held by every unit that has it plus one bonus
+    max_count = max(len(trait_units[t]) for t in range(scored_traits)) + 1
+    points_table = tuple(
+        tuple(sum(count >= bp for bp in breakpoints[t]) for count in range(max_count + 1))
+        for t in range(scored_traits)
+    )
+    next_breakpoints = tuple(
+        tuple(
+            next((bp for bp in breakpoints[t] if bp > count), breakpoints[t][-1])
+            for count in range(max_count + 1)
+        )
+        for t in range(scored_traits)
+    )
+    return GameData(
+        pack["name"],
+        pack["version"],
+        pack["title"],
+        {kind: pack["icons"][kind] for kind in ("champions", "traits")},
+        unit_names,
+        tuple(pack["units"][name] for name in unit_names),
+        trait_names,
+        scored_traits,
+        unit_traits,
+        trait_units,
+        breakpoints,
+        max_count,
+        points_table,
+        next_breakpoints,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_pack(name: str) -> GameData:
+    """
+    Returns the compiled game data of a pack, loaded once per process
+    The binary index is used when it matches the pack file (size and modification time), otherwise the pack is
+    parsed and the index rewritten
+    """
+    path = pack_path(name)
+    status = os.stat(path)
+    stamp = (status.st_size, status.st_mtime_ns)
+    cache_path = path[: -len(".json")] + ".cache"
+    try:
+        with open(cache_path, "rb") as file:
+            return GameData.loads(file.read(), stamp)
+    except (OSError, ValueError, EOFError, TypeError):
+        pass  # missing, unreadable or stale index
+
+    with open(path) as file:
+        data = build(json.load(file))
+    try:
+        # write then rename so concurrent processes never read a partial file
+        temp_path = f"{cache_path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as file:
+            file.write(data.dump(stamp))
+        os.replace(temp_path, cache_path)
+    except OSError:
+        pass  # read-only install (e.g. PyInstaller bundle), use the compiled data without caching
+    return data
+
+
+GAME_DATA = load_pack(ACTIVE_PACK)
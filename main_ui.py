@@ -1,9 +1,18 @@
 import collections
+from atlas import open_atlas
 import customtkinter
-from database import all_units, traits_breakpoints_units, unique_traits
+import functools
+import numpy as np
+import queue
+import threading
+import traceback
+from database import all_units, unique_traits, Unit
+from gamedata import GAME_DATA
 from PIL import Image
-from teambuilder import find_team
+from resultstore import cached_search, open_store
+from scoring import PAD, UNIT_NAMES, addition_scores, encode_team, score_population, swap_scores
 import sys
+from teambuilder import run_search
 import os
 
 # themeing
@@ -22,6 +31,29 @@ bd_flag = False  # True if Built Different II. Otherwise False
 # used for mapping unit cost to unit color
 cost_to_hex = {1: "#7f817e", 2: "#13c412", 3: "#4180c8", 4: "#bd10c8", 5: "#b79b1e"}
 CHAMPION_COL_LIMIT = 7  # number of champions in a UI row
+RESULT_COUNT = 10  # number of alternative comps kept from one search
+results = []  # alternative comps (Unit lists) from the last search, best first
+result_index = 0  # index of the displayed comp in results
+PROGRESS_INTERVAL = 10  # generations between live updates of the best comp
+POLL_MS = 50  # how often the UI checks on a running search
+search_thread = None  # background search, None if no search is running
+search_cancel = threading.Event()  # set to stop the running search
+search_updates = queue.Queue()  # messages from the search thread, only the Tk thread touches widgets
+result_store = open_store()  # comps of past searches, shown at once when a search is repeated, None if unusable
+comp_atlas = open_atlas()  # precomputed comps of common cores (see atlas.py), None if not built
+live_preview = True  # False while stored comps are shown, so the refining search doesn't replace them with worse ones
+# widgets reused across redraws instead of being destroyed and rebuilt
+team_slots = []  # (frame, unit button, "Make core" button, shown unit name) per team slot
+trait_rows = []  # (remove button, trait button, add button) per trait row
+core_buttons = []  # one button per core unit
+pager_widgets = []  # previous button, comp index label, next button
+size_widgets = []  # remove button, team size label, add button
+SUGGESTION_COUNT = 8  # moves shown in the suggestions panel
+suggestion_buttons = []  # one button per suggested move
+# units that can be suggested if Built Different (units with unique traits don't proc the buff)
+BD_SUGGESTABLE = np.array(
+    [not any(trait in unique_traits for trait in all_units[name].traits) for name in UNIT_NAMES]
+)
 """
     Functions
 """
@@ -38,33 +70,205 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 
+@functools.lru_cache(maxsize=None)
+def load_icon(kind: str, name: str, size: tuple[int, int]) -> customtkinter.CTkImage:
+    """
+    Returns the icon of a champion or trait (kind is "champions" or "traits") from the data pack's icon directory
+    Icons are decoded once per name and size and shared by every widget showing them
+    """
+    return customtkinter.CTkImage(
+        Image.open(resource_path(f"{GAME_DATA.icons[kind]}/{name}.png")), size=size
+    )
+
+
 def show_trait_count(trait: str, count: int) -> str:
     """
     Displays the next largest breakpoint if it exists.
     e.g. Frost "2/3" or Frost "4/5"
     """
-    if trait in unique_traits:
+    trait_id = GAME_DATA.trait_ids[trait]
+    if trait_id >= GAME_DATA.scored_traits:
         return f"{count}"  # format unique traits
     else:
-        # get next largest breakpoint. Otherwise, get the largest breakpoint
-        return f"{count} / {next((bp for bp in traits_breakpoints_units[trait][0] if count // bp == 0), traits_breakpoints_units[trait][0][-1])}"
+        # get next largest breakpoint. Otherwise, get the largest breakpoint (precomputed per count)
+        return f"{count} / {GAME_DATA.next_breakpoints[trait_id][min(count, GAME_DATA.max_count)]}"
+
+
+def rank_suggestions() -> list[tuple[Unit, Unit, int]]:
+    """
+    Returns up to SUGGESTION_COUNT moves (unit to remove or None, unit to add, points gained), best first
+    Every unit off the board is scored as an addition, or once the board is full as a swap for each board unit other
+    than core units, in one vectorized pass. If Built Different, losing points is better
+    """
+    sign = -1 if bd_flag else 1
+    base = int(score_population(encode_team(team_list)[None], bonus_traits)[0])
+    allowed = np.ones(PAD, dtype=bool)
+    allowed[encode_team(team_list)] = False
+    if bd_flag:
+        allowed &= BD_SUGGESTABLE
+    if len(team_list) < team_size:
+        gains = addition_scores(team_list, bonus_traits) - base
+        order = [i for i in np.argsort(-sign * gains, kind="stable") if allowed[i]]
+        return [(None, all_units[UNIT_NAMES[i]], int(gains[i])) for i in order[:SUGGESTION_COUNT]]
+    gains = swap_scores(team_list, bonus_traits) - base
+    movable = np.array([unit.name not in included_units for unit in team_list], dtype=bool)
+    ranked = np.where(movable[:, None] & allowed[None, :], sign * gains, 0)
+    best = np.argsort(-ranked, axis=None, kind="stable")[:SUGGESTION_COUNT]
+    return [
+        (team_list[i], all_units[UNIT_NAMES[j]], int(gains[i, j]))
+        for i, j in zip(*np.unravel_index(best, gains.shape))
+        if ranked[i, j] > 0  # only swaps that improve the board
+    ]
+
+
+def apply_suggestion(removed: Unit, added: Unit):
+    """
+    Adds a suggested unit, or swaps it in place of the removed unit
+    """
+    if removed is None:
+        add_unit(added)
+        return
+    team_list[team_list.index(removed)] = added
+    draw_team()
+    draw_traits()
+
+
+def search_in_background(search_kwargs: dict):
+    """
+    Runs on the search thread. A search in the atlas is answered from it without searching. A repeated search shows
+    its stored comps at once, then searches again to refine them. Without a result store it is a plain search
+    Always ends with a "done" or "error" update, so poll_search re-enables the buttons
+    """
+    try:
+        if comp_atlas is not None:
+            result = comp_atlas.lookup(
+                search_kwargs["bonus_traits"],
+                search_kwargs["included_units"],
+                search_kwargs["bd"],
+                search_kwargs["team_size"],
+                search_kwargs["top_k"],
+            )
+            if result is not None:
+                search_updates.put(("done", result))
+                return
+        if result_store is None:
+            search_updates.put(("done", run_search(**search_kwargs)))
+            return
+        cached = result_store.lookup(
+            search_kwargs["bonus_traits"],
+            search_kwargs["included_units"],
+            search_kwargs["bd"],
+            search_kwargs["team_size"],
+        )
+        if cached is not None:
+            search_updates.put(("cached", cached))
+        search_updates.put(("done", cached_search(result_store, refine=True, **search_kwargs)))
+    except Exception as e:  # e.g. a locked result store, report it and keep the UI usable
+        traceback.print_exc()
+        search_updates.put(("error", e))
 
 
 def generate_team():
     """
-    Define team_list by calling find_team
+    Start a search in a background thread, keeping the other top comps to page through
+    The best comp so far is drawn while the search runs (see poll_search)
     """
-    global team_list
-    new_team, _ = find_team(
-        bonus_traits=bonus_traits,
-        included_units=included_units,
+    global search_thread, live_preview
+    if search_thread is not None:
+        return  # a search is already running
+    search_cancel.clear()
+    live_preview = True
+    # snapshot the settings so edits during the search don't affect it
+    search_kwargs = dict(
+        bonus_traits=dict(bonus_traits),
+        included_units=included_units.copy(),
         team_size=team_size,
         bd=bd_flag,
+        top_k=RESULT_COUNT,
+        seed_teams=[team_list.copy()] if team_list else None,
+        progress=lambda generation, best_team, points: search_updates.put(
+            ("progress", generation, best_team.copy(), points)
+        ),
+        progress_interval=PROGRESS_INTERVAL,
+        cancel=search_cancel,
     )
-    team_list = new_team
+    search_thread = threading.Thread(
+        target=search_in_background,
+        args=(search_kwargs,),
+        daemon=True,
+    )
+    search_thread.start()
+    generate.configure(state="disabled")
+    cancel.configure(state="normal")
+    status.configure(text="Generating...")
+    root.after(POLL_MS, poll_search)
+
+
+def cancel_search():
+    """
+    Ask the running search to stop, its best comps so far are still shown
+    """
+    search_cancel.set()
+
+
+def poll_search():
+    """
+    Apply updates from the search thread on the Tk thread
+    """
+    global search_thread, results, team_list, live_preview
+    best_points = None
+    while True:
+        try:
+            update = search_updates.get_nowait()
+        except queue.Empty:
+            break
+        if update[0] == "progress":
+            _, generation, best_team, points = update
+            status.configure(text=f"Generation {generation}: {points} points")
+            if live_preview and points != best_points:  # only redraw the live comp when it changes
+                best_points = points
+                team_list = best_team
+                draw_team()
+                draw_traits()
+        elif update[0] == "cached":
+            result = update[1]
+            live_preview = False
+            status.configure(text=f"{result.points} points (stored), refining...")
+            results = [new_team for new_team, _ in result.teams]
+            show_result(0)
+        else:
+            result = update[1]
+            search_thread = None
+            generate.configure(state="normal")
+            cancel.configure(state="disabled")
+            if update[0] == "error":
+                status.configure(text=f"Search failed: {result}")
+                return
+            if result is None:
+                status.configure(text="No team could be generated")
+                return
+            status.configure(
+                text=f"{result.points} points, stopped at generation {result.generation}: {result.stop_reason}"
+            )
+            results = [new_team for new_team, _ in result.teams]
+            show_result(0)
+            return
+    root.after(POLL_MS, poll_search)
+
+
+def show_result(index: int):
+    """
+    Display the comp at index of the last search results
+    """
+    global team_list, result_index
+    if not results:
+        return
+    result_index = index % len(results)
+    team_list = results[result_index].copy()
     # update team and traits display
     draw_team()
     draw_traits()
+    draw_result_pager()
 
 
 def add_bonus_trait(trait: str):
@@ -114,17 +318,20 @@ def increment_team_size():
     global team_size
     team_size += 1
     draw_team_size()
+    draw_suggestions()
 
 
 def decrement_team_size():
     global team_size
     team_size -= 1
     draw_team_size()
+    draw_suggestions()
 
 
 def toggle_bd():
     global bd_flag
     bd_flag = not bd_flag
+    draw_suggestions()
 
 
 """
@@ -136,7 +343,7 @@ def toggle_bd():
     The App root
 """
 root = customtkinter.CTk()
-root.title("TFT Set 12 AI Planner")
+root.title(GAME_DATA.title)
 root.geometry("1300x870")
 
 frame = customtkinter.CTkFrame(master=root)
@@ -160,6 +367,8 @@ champions.pack(fill="both", padx=10, pady=10, expand=True)
 """
 traits = customtkinter.CTkScrollableFrame(master=top)
 traits.pack(side="left", fill="y")
+traits_label = customtkinter.CTkLabel(master=traits, text="Traits", font=("Roboto", 24))
+traits_label.grid(row=0, column=1, pady=10)
 
 """
     Contains current team comp and core unit frames
@@ -179,6 +388,12 @@ team_misc_frame.pack(fill="both", side="left", expand=True)
 team = customtkinter.CTkFrame(master=team_misc_frame)
 team.pack(fill="both")
 
+"""
+    Displays search progress
+"""
+status = customtkinter.CTkLabel(master=team_misc_frame, text="")
+status.pack(fill="x")
+
 """
     Displays "Generate team comp" button
 """
@@ -189,6 +404,24 @@ generate = customtkinter.CTkButton(
 )
 generate.pack(side="left", pady=10, padx=10)
 
+"""
+    Displays "Cancel" button, enabled while a search is running
+"""
+cancel = customtkinter.CTkButton(
+    master=team_misc_frame,
+    text="Cancel",
+    width=60,
+    state="disabled",
+    command=cancel_search,
+)
+cancel.pack(side="left", pady=10)
+
+"""
+    Displays previous/next buttons to page through the generated comps
+"""
+pager = customtkinter.CTkFrame(master=team_misc_frame)
+pager.pack(side="left", pady=10)
+
 """
     Displays "Build Different II" checkbox
 """
@@ -205,201 +438,273 @@ bd_box.pack(side="left", padx=10)
 size = customtkinter.CTkFrame(master=team_misc_frame)
 size.pack(side="right", pady=10, padx=10)
 
+"""
+    Displays the best next units for the board
+"""
+suggestions = customtkinter.CTkScrollableFrame(master=team_core_frame)
+suggestions.pack(side="right", fill="y")
+suggestions_label = customtkinter.CTkLabel(master=suggestions, text="Suggestions", font=("Roboto", 24))
+suggestions_label.pack(side="top", fill="x")
+
 """
     Displays core units
 """
 core = customtkinter.CTkScrollableFrame(master=team_core_frame)
 core.pack(side="right", fill="y")
+core_label = customtkinter.CTkLabel(master=core, text="Core Units", font=("Roboto", 24))
+core_label.pack(side="top", fill="x")
 
 
-# draw champion buttons
-row = 0
-col = 0
-for unit in sorted(all_units):
-    img = customtkinter.CTkImage(
-        # Image.open(f"assets/champions/{unit}.png"), size=(60, 60)
-        Image.open(resource_path(f"assets/champions/{unit}.png")),
-        size=(60, 60),
-    )
-    button = customtkinter.CTkButton(
-        master=champions,
-        image=img,
-        text=unit,
-        fg_color="transparent",
-        command=lambda unit=unit: add_unit(all_units[unit]),
-    )
-    button.grid(row=row, column=col, padx=10, pady=10)
-    col += 1
-    if col == CHAMPION_COL_LIMIT:
-        row += 1
-        col = 0
+def draw_champions():
+    """
+    Draw champion buttons, scheduled after the window is shown
+    """
+    for i, unit in enumerate(sorted(all_units)):
+        button = customtkinter.CTkButton(
+            master=champions,
+            image=load_icon("champions", unit, (60, 60)),
+            text=unit,
+            fg_color="transparent",
+            command=lambda unit=unit: add_unit(all_units[unit]),
+        )
+        button.grid(
+            row=i // CHAMPION_COL_LIMIT,
+            column=i % CHAMPION_COL_LIMIT,
+            padx=10,
+            pady=10,
+        )
 
 
 def draw_traits():
     """
-    Draw current team traits
+    Draw current team traits, updating the existing rows in place
     """
-    # update frame by deleting beforehand
-    for widget in traits.winfo_children():
-        widget.destroy()
-
-    traits_label = customtkinter.CTkLabel(
-        master=traits, text="Traits", font=("Roboto", 24)
-    )
-    traits_label.grid(row=0, column=1, pady=10)
-
-    # trait counter works similiarly to calculate_points()
-    trait_counter = collections.defaultdict(int)  # avoid KeyError
+    # trait counter works similiarly to calculate_points(), counting by trait id
+    trait_counter = collections.Counter()
 
     for unit in team_list:
-        unit_traits = all_units[unit.name].traits
-        for trait in unit_traits:
-            trait_counter[trait] += 1
+        trait_counter.update(GAME_DATA.unit_traits[unit.id])
 
     for trait, count in bonus_traits.items():
-        trait_counter[trait] += count
+        trait_counter[GAME_DATA.trait_ids[trait]] += count
 
     # sort traits in descending order
-    sort_traits = {
-        trait: count
+    sort_traits = [
+        (GAME_DATA.trait_names[trait], count)
         for trait, count in sorted(
             trait_counter.items(), key=lambda item: item[1], reverse=True
         )
-    }
-    row = 1  # recall traits_label is row 0
+        if count > 0
+    ]
+
+    # add rows as needed, recall traits_label is row 0
+    while len(trait_rows) < len(sort_traits):
+        row = len(trait_rows) + 1
+        remove_button = customtkinter.CTkButton(master=traits, text="-", width=5)
+        button = customtkinter.CTkButton(master=traits, text="", fg_color="transparent")
+        button.grid(row=row, column=1, pady=10)
+        add_button = customtkinter.CTkButton(master=traits, text="+", width=5)
+        add_button.grid(row=row, column=2, padx=5)
+        trait_rows.append((remove_button, button, add_button))
+
     # draw team traits
-    for trait, count in sort_traits.items():
-        if count > 0:
-            img = customtkinter.CTkImage(
-                # Image.open(f"assets/traits/{trait}.png"), size=(32, 32)
-                Image.open(resource_path(f"assets/traits/{trait}.png")),
-                size=(32, 32),
-            )
-            button = customtkinter.CTkButton(
-                master=traits,
-                image=img,
-                text=show_trait_count(trait, count),  #
-                fg_color="transparent",
-            )
-            button.grid(row=row, column=1, pady=10)
-            add_button = customtkinter.CTkButton(
-                master=traits,
-                text="+",
-                width=5,
-                command=lambda trait=trait: add_bonus_trait(trait),
+    for i, (remove_button, button, add_button) in enumerate(trait_rows):
+        if i >= len(sort_traits):
+            remove_button.grid_remove()
+            button.grid_remove()
+            add_button.grid_remove()
+            continue
+        trait, count = sort_traits[i]
+        button.configure(
+            image=load_icon("traits", trait, (32, 32)),
+            text=show_trait_count(trait, count),
+        )
+        button.grid()
+        add_button.configure(command=lambda trait=trait: add_bonus_trait(trait))
+        add_button.grid()
+        if trait in bonus_traits and bonus_traits[trait] > 0:
+            remove_button.configure(
+                command=lambda trait=trait: remove_bonus_trait(trait)
             )
-            add_button.grid(row=row, column=2, padx=5)
-            if trait in bonus_traits and bonus_traits[trait] > 0:
-                remove_button = customtkinter.CTkButton(
-                    master=traits,
-                    text="-",
-                    width=5,
-                    command=lambda trait=trait: remove_bonus_trait(trait),
-                )
-                remove_button.grid(row=row, column=0, padx=5)
-            row += 1
+            remove_button.grid(row=i + 1, column=0, padx=5)
+        else:
+            remove_button.grid_remove()
 
+    # suggestions depend on the same board and bonus traits
+    draw_suggestions()
 
-def draw_team():
+
+def draw_suggestions():
+    """
+    Draw the suggested moves for the board, reusing the existing buttons
     """
-    Draw current team comp
-    """
-    for widget in team.winfo_children():
-        widget.destroy()
-
-    row = 0
-    col = 0
-    for i in range(team_size):
-        img = customtkinter.CTkImage(
-            # Image.open(
-            #     f"assets/champions/{'default' if i >= len(team_list) else team_list[i].name}.png"
-            # ),
-            Image.open(
-                resource_path(
-                    f"assets/champions/{'default' if i >= len(team_list) else team_list[i].name}.png"
-                )
+    moves = rank_suggestions()
+    while len(suggestion_buttons) < len(moves):
+        button = customtkinter.CTkButton(
+            master=suggestions, text="", fg_color="transparent", anchor="w"
+        )
+        suggestion_buttons.append(button)
+
+    for i, button in enumerate(suggestion_buttons):
+        if i >= len(moves):
+            button.pack_forget()
+            continue
+        removed, added, gain = moves[i]
+        button.configure(
+            image=load_icon("champions", added.name, (32, 32)),
+            text=(
+                f"{added.name} {gain:+d}"
+                if removed is None
+                else f"{removed.name} -> {added.name} {gain:+d}"
             ),
-            size=(125, 150),
+            command=lambda removed=removed, added=added: apply_suggestion(removed, added),
         )
+        if not button.winfo_manager():
+            button.pack(pady=5, fill="x")
+
+
+def draw_team():
+    """
+    Draw current team comp, only updating the slots whose unit changed
+    """
+    # add slots as needed (team size can grow)
+    while len(team_slots) < team_size:
+        i = len(team_slots)
         button_frame = customtkinter.CTkFrame(master=team)
-        button_frame.grid(row=row, column=col, padx=10, pady=10)
         button = customtkinter.CTkButton(
             master=button_frame,
-            image=img,
+            image=load_icon("champions", "default", (125, 150)),
             text="",
             fg_color="transparent",
             command=lambda i=i: remove_unit(i),
-            border_color=(
-                None if i >= len(team_list) else cost_to_hex[team_list[i].cost]
-            ),
-            border_width=0 if i >= len(team_list) else 5,
+            border_width=0,
         )
         button.pack(fill="both")
-        if i < len(team_list):
-            favourite = customtkinter.CTkButton(
-                master=button_frame,
-                text="Make core",
-                fg_color="red",
-                text_color="black",
-                command=lambda i=i: add_core(team_list[i].name),
+        favourite = customtkinter.CTkButton(
+            master=button_frame,
+            text="Make core",
+            fg_color="red",
+            text_color="black",
+            command=lambda i=i: add_core(team_list[i].name),
+        )
+        team_slots.append([button_frame, button, favourite, None])
+
+    for i, slot in enumerate(team_slots):
+        button_frame, button, favourite, shown = slot
+        if i >= team_size:
+            button_frame.grid_remove()
+            continue
+        button_frame.grid(row=i // 5, column=i % 5, padx=10, pady=10)  # 5 units per row
+        name = team_list[i].name if i < len(team_list) else None
+        if name == shown:
+            continue
+        slot[3] = name
+        if name is None:
+            button.configure(
+                image=load_icon("champions", "default", (125, 150)), border_width=0
             )
-            favourite.pack(side="bottom")
-        col += 1
-        if col == 5:  # 5 units per row
-            row += 1
-            col = 0
+            favourite.pack_forget()
+        else:
+            button.configure(
+                image=load_icon("champions", name, (125, 150)),
+                border_color=cost_to_hex[team_list[i].cost],
+                border_width=5,
+            )
+            if not favourite.winfo_manager():
+                favourite.pack(side="bottom")
 
 
-def draw_team_size():
+def draw_result_pager():
     """
-    Draw team size selector
+    Draw previous/next comp buttons and the index of the displayed comp, reusing the existing widgets
     """
-    for widget in size.winfo_children():
-        widget.destroy()
+    if not pager_widgets:
+        pager_widgets.extend(
+            [
+                customtkinter.CTkButton(
+                    master=pager,
+                    text="<",
+                    width=5,
+                    command=lambda: show_result(result_index - 1),
+                ),
+                customtkinter.CTkLabel(master=pager, text=""),
+                customtkinter.CTkButton(
+                    master=pager,
+                    text=">",
+                    width=5,
+                    command=lambda: show_result(result_index + 1),
+                ),
+            ]
+        )
 
-    label = customtkinter.CTkLabel(master=size, text=f"Team Size: {team_size}")
-    label.grid(row=0, column=1, padx=10)
+    for column, widget in enumerate(pager_widgets):
+        if len(results) < 2:
+            widget.grid_remove()
+        elif not widget.winfo_manager():
+            widget.grid(row=0, column=column, padx=5)
+    pager_widgets[1].configure(text=f"Comp {result_index + 1} / {len(results)}")
 
-    add_button = customtkinter.CTkButton(
-        master=size, text="+", width=5, command=increment_team_size
-    )
-    add_button.grid(row=0, column=2)
-    if team_size > DEFAULT_TEAM_SIZE:
-        remove_button = customtkinter.CTkButton(
-            master=size, text="-", width=5, command=decrement_team_size
+
+def draw_team_size():
+    """
+    Draw team size selector, reusing the existing widgets
+    """
+    if not size_widgets:
+        size_widgets.extend(
+            [
+                customtkinter.CTkButton(
+                    master=size, text="-", width=5, command=decrement_team_size
+                ),
+                customtkinter.CTkLabel(master=size, text=""),
+                customtkinter.CTkButton(
+                    master=size, text="+", width=5, command=increment_team_size
+                ),
+            ]
         )
-        remove_button.grid(row=0, column=0, padx=5)
+        remove_button, label, add_button = size_widgets
+        label.grid(row=0, column=1, padx=10)
+        add_button.grid(row=0, column=2)
+
+    remove_button, label, _ = size_widgets
+    label.configure(text=f"Team Size: {team_size}")
+    if team_size > DEFAULT_TEAM_SIZE:
+        if not remove_button.winfo_manager():
+            remove_button.grid(row=0, column=0, padx=5)
+    else:
+        remove_button.grid_remove()
 
 
 def draw_core():
     """
-    Draw core unit list
+    Draw core unit list, reusing the existing buttons
     """
-    for widget in core.winfo_children():
-        widget.destroy()
-
-    label = customtkinter.CTkLabel(master=core, text="Core Units", font=("Roboto", 24))
-    label.pack(side="top", fill="x")
-    for i in range(len(included_units)):
-        img = customtkinter.CTkImage(
-            # Image.open(f"assets/champions/{included_units[i]}.png"), size=(60, 60)
-            Image.open(resource_path(f"assets/champions/{included_units[i]}.png")),
-            size=(60, 60),
-        )
+    while len(core_buttons) < len(included_units):
+        i = len(core_buttons)
         button = customtkinter.CTkButton(
             master=core,
-            image=img,
             text="",
             fg_color="transparent",
             command=lambda i=i: remove_core(i),
         )
-        button.pack(pady=10)
+        core_buttons.append(button)
+
+    for i, button in enumerate(core_buttons):
+        if i >= len(included_units):
+            button.pack_forget()
+            continue
+        button.configure(image=load_icon("champions", included_units[i], (60, 60)))
+        if not button.winfo_manager():
+            button.pack(pady=10)
+
+    # core units are never suggested for swapping out
+    draw_suggestions()
 
 
 draw_traits()
 draw_core()
 draw_team()
 draw_team_size()
+root.after(0, draw_champions)
 
 # keep GUI running
 root.mainloop()
@@ -0,0 +1,208 @@
+"""
+  Persistent on-disk store of search results
+  Results are keyed on the normalized search spec (core units, bonus traits, Built Different and team size) plus the
+  data pack name and version, so a repeated search returns its top comps at once. A repeated search given more budget refines
+  the stored comps: its new comps are merged with the stored ones (see ResultStore.record).
+  The store is a SQLite database, which handles concurrent readers and writers from several processes. The least
+  recently used entries are evicted beyond max_entries.
+"""
+
+import contextlib
+import json
+import os
+import sqlite3
+import time
+
+from database import pack_units
+from gamedata import GAME_DATA, GameData
+from teambuilder import HallOfFame, SearchResult, run_search
+
+"""
+    Global Variables
+"""
+# e.g. TFT_RESULT_STORE=results.sqlite3, the default lives in the user's home since the app may be installed read-only
+STORE_PATH = os.environ.get(
+    "TFT_RESULT_STORE", os.path.join(os.path.expanduser("~"), ".tft_planner", "results.sqlite3")
+)
+STOP_CACHED = "cached result"
+# seconds a process waits for another process holding the write lock
+LOCK_TIMEOUT = 30
+
+
+def spec_key(
+    bonus_traits: dict[str, int] = None,
+    included_units: list[str] = None,
+    bd: bool = False,
+    team_size: int = 10,
+    data: GameData = GAME_DATA,
+) -> str:
+    """
+    Returns the store key of a search, the same for every ordering of core units and bonus traits
+    """
+    return json.dumps(
+        {
+            "data": [data.name, data.version],
+            "core": sorted(set(included_units or [])),
+            "bonus_traits": sorted((bonus_traits or {}).items()),
+            "bd": bool(bd),
+            "team_size": team_size,
+        },
+        sort_keys=True,
+    )
+
+
+class ResultStore:
+    """
+    Bounded LRU store of the top comps of past searches
+    A connection is opened per call so the store can be shared by threads and processes
+    """
+
+    def __init__(self, path: str = STORE_PATH, max_entries: int = 1000):
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as connection:
+            # write-ahead logging lets readers proceed while another process writes
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, teams TEXT NOT NULL, generations INTEGER NOT NULL, "
+                "runtime REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=LOCK_TIMEOUT, isolation_level=None)
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def __len__(self) -> int:
+        with self._connect() as connection:
+            return connection.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def lookup(
+        self,
+        bonus_traits: dict[str, int] = None,
+        included_units: list[str] = None,
+        bd: bool = False,
+        team_size: int = 10,
+        data: GameData = GAME_DATA,
+    ) -> SearchResult:
+        """
+        Returns the stored comps of a search as a SearchResult, or None if the search was never recorded
+        generation and runtime are the totals of every search merged into the entry
+        """
+        key = spec_key(bonus_traits, included_units, bd, team_size, data)
+        with self._connect() as connection:
+            row = connection.execute(
+                "SELECT teams, generations, runtime FROM results WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        all_units = pack_units(data)
+        teams = [([all_units[name] for name in names], points) for names, points in json.loads(row[0])]
+        return SearchResult(teams[0][0], teams[0][1], row[1], STOP_CACHED, row[2], teams)
+
+    def record(
+        self,
+        result: SearchResult,
+        bonus_traits: dict[str, int] = None,
+        included_units: list[str] = None,
+        bd: bool = False,
+        team_size: int = 10,
+        min_distance: int = 2,
+        data: GameData = GAME_DATA,
+    ) -> SearchResult:
+        """
+        Merges the comps of a search into its entry and returns the merged result
+        The entry keeps the best distinct comps (see HallOfFame) of every recorded search, as many as the largest
+        search asked for
+        """
+        key = spec_key(bonus_traits, included_units, bd, team_size, data)
+        with self._connect() as connection:
+            # take the write lock before reading so concurrent merges of the same key are not lost
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT teams, generations, runtime FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                stored = [] if row is None else json.loads(row[0])
+                hall_of_fame = HallOfFame(max(len(stored), len(result.teams), 1), min_distance, bd)
+                for names, points in stored:
+                    hall_of_fame.offer([pack_units(data)[name] for name in names], points)
+                for team, points in result.teams or [(result.team, result.points)]:
+                    hall_of_fame.offer(team, points)
+                teams = [
+                    (sorted(team, key=lambda unit: unit.cost), points)
+                    for team, points in hall_of_fame.teams()
+                ]
+                generations = result.generation + (0 if row is None else row[1])
+                runtime = result.runtime + (0 if row is None else row[2])
+                connection.execute(
+                    "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)",
+                    (
+                        key,
+                        json.dumps([([unit.name for unit in team], points) for team, points in teams]),
+                        generations,
+                        runtime,
+                        time.time(),
+                    ),
+                )
+                # evict the least recently used entries
+                connection.execute(
+                    "DELETE FROM results WHERE key NOT IN "
+                    "(SELECT key FROM results ORDER BY last_used DESC LIMIT ?)",
+                    (self.max_entries,),
+                )
+                connection.execute("COMMIT")
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+        return SearchResult(
+            teams[0][0], teams[0][1], generations, result.stop_reason, runtime, teams
+        )
+
+    def clear(self):
+        with self._connect() as connection:
+            connection.execute("DELETE FROM results")
+
+
+def open_store(path: str = STORE_PATH) -> ResultStore:
+    """
+    Returns the result store at path, or None if it cannot be opened (e.g. an unwritable home or a locked database)
+    """
+    try:
+        return ResultStore(path)
+    except (OSError, sqlite3.Error) as e:
+        print(f"Result store not used: {e}")
+        return None
+
+
+def cached_search(store: ResultStore, refine: bool = False, **kwargs) -> SearchResult:
+    """
+    run_search backed by a ResultStore, takes the same keyword arguments
+    A recorded search returns its stored comps without searching, unless refine is set: the search then runs with
+    the given budget, starting from the stored comps, and its comps are merged with the stored ones
+    Returns None if no team can be generated
+    """
+    spec = {
+        name: kwargs[name]
+        for name in ("bonus_traits", "included_units", "bd", "team_size", "data")
+        if name in kwargs
+    }
+    cached = store.lookup(**spec)
+    if cached is not None:
+        if not refine:
+            return cached
+        # refine from the stored comps rather than from scratch
+        kwargs["seed_teams"] = list(kwargs.get("seed_teams") or []) + [team for team, _ in cached.teams]
+    result = run_search(**kwargs)
+    if result is None:
+        return None
+    return store.record(result, min_distance=kwargs.get("min_distance", 2), **spec)
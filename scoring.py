@@ -0,0 +1,305 @@
+"""
+  Compiled trait-incidence layer used to score whole populations of teams in one NumPy pass
+  Units and traits are given dense integer indices, teams are encoded as arrays of unit indices (or bitmasks),
+  and a population is a 2D array of shape (teams, team_size). Scores match teambuilder.calculate_points.
+  Every function takes the data pack of the teams (default gamedata.GAME_DATA), whose tables are built on first use.
+"""
+
+import collections
+import functools
+
+import numpy as np
+
+from database import Unit, pack_units
+from gamedata import GAME_DATA, GameData
+
+"""
+    Index tables of a data pack (ids follow its GameData and Unit.id)
+"""
+
+
+class PackTables:
+    """
+    Scoring tables of one data pack, built once per pack (see tables)
+    units[i] - Unit with id i, PAD is the padding id of ragged teams and maps to an all-zero row of incidence
+    incidence[u, t] - 1 if unit u has scored trait t (the last row is the padding unit)
+    points[t, c] - number of breakpoints of trait t reached with c units, so scoring is a gather-and-sum
+    unit_traits[u] - scored trait ids of unit u, for per-team updates without NumPy
+    """
+
+    def __init__(self, data: GameData):
+        self.data = data
+        units = pack_units(data)
+        self.unit_names = list(data.unit_names)
+        self.units = [units[name] for name in self.unit_names]
+        # only traits with breakpoints can score (unique traits are ignored by calculate_points)
+        self.trait_names = list(data.trait_names[: data.scored_traits])
+        self.trait_index = {trait: i for i, trait in enumerate(self.trait_names)}
+        self.pad = len(self.unit_names)
+        self.incidence = np.zeros((self.pad + 1, len(self.trait_names)), dtype=np.int16)
+        for unit_id, unit_traits in enumerate(data.unit_traits):
+            for trait_id in unit_traits:
+                if trait_id < data.scored_traits:
+                    self.incidence[unit_id, trait_id] = 1
+        self.max_count = data.max_count
+        self.points = np.array(data.points_table, dtype=np.int16)
+        self.trait_range = np.arange(len(self.trait_names))
+        self.unit_traits = tuple(
+            tuple(t for t in unit_traits if t < data.scored_traits) for unit_traits in data.unit_traits
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def tables(data: GameData = GAME_DATA) -> PackTables:
+    """
+    Returns the scoring tables of a data pack (see gamedata.load_pack), so one process can search several packs
+    """
+    return PackTables(data)
+
+
+"""
+    Tables of the active pack (gamedata.GAME_DATA), the default of every function taking a data pack
+"""
+TABLES = tables(GAME_DATA)
+# index -> unit name, and the inverse mapping
+UNIT_NAMES = TABLES.unit_names
+UNIT_INDEX = GAME_DATA.unit_ids
+TRAIT_NAMES = TABLES.trait_names
+TRAIT_INDEX = TABLES.trait_index
+PAD = TABLES.pad
+INCIDENCE = TABLES.incidence
+MAX_COUNT = TABLES.max_count
+POINTS_TABLE = TABLES.points
+TRAIT_RANGE = TABLES.trait_range
+UNIT_TRAITS = TABLES.unit_traits
+
+
+def encode_team(team: list[Unit]) -> np.ndarray:
+    """
+    Returns the team as an array of unit indices
+    """
+    return np.array([unit.id for unit in team], dtype=np.intp)
+
+
+def decode_team(indices, data: GameData = GAME_DATA) -> list[Unit]:
+    """
+    Returns the Unit objects for an array of unit indices (padding is skipped)
+    """
+    pack = tables(data)
+    return [pack.units[i] for i in indices if i != pack.pad]
+
+
+def team_mask(team: list[Unit]) -> int:
+    """
+    Returns an order-independent bitmask of the team, bit i is set if unit i is on the team
+    """
+    mask = 0
+    for unit in team:
+        mask |= 1 << unit.id
+    return mask
+
+
+def mask_to_indices(mask: int, data: GameData = GAME_DATA) -> list[int]:
+    """
+    Returns the unit indices set in a team bitmask
+    """
+    return [i for i in range(tables(data).pad) if mask >> i & 1]
+
+
+def encode_population(population: list[list[Unit]], data: GameData = GAME_DATA) -> np.ndarray:
+    """
+    Returns the population as a 2D array of unit indices
+    Teams shorter than the largest team are padded with the pack's PAD
+    """
+    width = max((len(team) for team in population), default=0)
+    encoded = np.full((len(population), width), tables(data).pad, dtype=np.intp)
+    for row, team in enumerate(population):
+        encoded[row, : len(team)] = [unit.id for unit in team]
+    return encoded
+
+
+def bonus_vector(bonus_traits: dict[str, int], data: GameData = GAME_DATA) -> np.ndarray:
+    """
+    Returns the trait counts contributed by bonus traits
+    Mirrors calculate_points: every scored bonus trait adds a single count
+    """
+    trait_index = tables(data).trait_index
+    bonus = np.zeros(len(trait_index), dtype=np.int16)
+    if bonus_traits:
+        for trait in bonus_traits:
+            if trait in trait_index:
+                bonus[trait_index[trait]] += 1
+    return bonus
+
+
+def bonus_key(bonus_traits: dict[str, int], data: GameData = GAME_DATA) -> tuple[int, ...]:
+    """
+    Returns the sorted ids of the scored bonus traits, the hashable form of bonus_traits used to cache score tables
+    """
+    trait_index = tables(data).trait_index
+    return tuple(sorted(trait_index[trait] for trait in bonus_traits or () if trait in trait_index))
+
+
+@functools.lru_cache(maxsize=64)
+def _points_table(bonus: tuple[int, ...], data: GameData) -> tuple[tuple[int, ...], ...]:
+    offsets = [0] * data.scored_traits
+    for trait in bonus:
+        offsets[trait] += 1
+    return tuple(
+        tuple(row[min(count + offset, data.max_count)] for count in range(data.max_count + 1))
+        for row, offset in zip(data.points_table, offsets)
+    )
+
+
+def points_table(bonus_traits: dict[str, int], data: GameData = GAME_DATA) -> tuple[tuple[int, ...], ...]:
+    """
+    Returns the cumulative score table of a search with the bonus traits folded in
+    points_table(bonus_traits)[t][c] is the number of breakpoints of trait t reached with c units on the team, so a
+    team's points are a gather-and-sum over its trait counts without bonus traits
+    """
+    return _points_table(bonus_key(bonus_traits, data), data)
+
+
+@functools.lru_cache(maxsize=64)
+def _score_table(bonus: tuple[int, ...], data: GameData) -> np.ndarray:
+    return np.array(_points_table(bonus, data), dtype=np.int16)
+
+
+def score_table(bonus_traits: dict[str, int], data: GameData = GAME_DATA) -> np.ndarray:
+    """
+    points_table as an array of shape (traits, MAX_COUNT + 1), for scoring populations
+    """
+    return _score_table(bonus_key(bonus_traits, data), data)
+
+
+def trait_counts(
+    population: np.ndarray, bonus_traits: dict[str, int], data: GameData = GAME_DATA
+) -> np.ndarray:
+    """
+    Returns the trait counts of every team in an encoded population, shape (teams, traits)
+    """
+    return tables(data).incidence[population].sum(axis=1) + bonus_vector(bonus_traits, data)
+
+
+def score_counts(counts: np.ndarray, data: GameData = GAME_DATA) -> np.ndarray:
+    """
+    Returns the points for each row of trait counts
+    """
+    pack = tables(data)
+    return pack.points[pack.trait_range, np.minimum(counts, pack.max_count)].sum(axis=-1)
+
+
+def score_population(
+    population: np.ndarray, bonus_traits: dict[str, int], data: GameData = GAME_DATA
+) -> np.ndarray:
+    """
+    Returns the points of every team in an encoded population, same as calling calculate_points on each team
+    """
+    if len(population) == 0:
+        return np.zeros(0, dtype=np.int64)
+    pack = tables(data)
+    table = score_table(bonus_traits, data)
+    return table[pack.trait_range, pack.incidence[population].sum(axis=1)].sum(axis=-1)
+
+
+def addition_scores(team: list[Unit], bonus_traits: dict[str, int], data: GameData = GAME_DATA) -> np.ndarray:
+    """
+    Returns the points of the team with each unit added, indexed by unit id, in one vectorized pass
+    Units already on the team are scored as if added twice and should be skipped by the caller
+    """
+    pack = tables(data)
+    counts = pack.incidence[encode_team(team)].sum(axis=0)
+    table = score_table(bonus_traits, data)
+    return table[pack.trait_range, np.minimum(counts + pack.incidence[: pack.pad], pack.max_count)].sum(axis=-1)
+
+
+def swap_scores(team: list[Unit], bonus_traits: dict[str, int], data: GameData = GAME_DATA) -> np.ndarray:
+    """
+    Returns the points of the team with its i-th unit swapped for each unit, shape (team size, units)
+    """
+    pack = tables(data)
+    members = pack.incidence[encode_team(team)]
+    counts = members.sum(axis=0) - members[:, None, :] + pack.incidence[None, : pack.pad, :]
+    table = score_table(bonus_traits, data)
+    return table[pack.trait_range, np.minimum(counts, pack.max_count)].sum(axis=-1)
+
+
+def apply_delta(
+    counts: list[int],
+    points: int,
+    removed: list[Unit],
+    added: list[Unit],
+    data: GameData = GAME_DATA,
+) -> tuple[list[int], int]:
+    """
+    Returns the trait counts and points of a team after swapping the removed units for the added units
+    Only the traits of the changed units are re-checked against their breakpoints
+    """
+    counts = counts.copy()
+    table = data.points_table  # counts never exceed max_count, so no clipping is needed
+    unit_traits = tables(data).unit_traits
+    for unit in removed:
+        for trait in unit_traits[unit.id]:
+            count = counts[trait]
+            points += table[trait][count - 1] - table[trait][count]
+            counts[trait] = count - 1
+    for unit in added:
+        for trait in unit_traits[unit.id]:
+            count = counts[trait]
+            points += table[trait][count + 1] - table[trait][count]
+            counts[trait] = count + 1
+    return counts, points
+
+
+class FitnessCache:
+    """
+    Bounded LRU cache of the trait counts and points of teams, so a bred team seen before is not scored again
+    Keys are (team bitmask, data pack, bonus traits, Built Different) so teams are matched regardless of unit order and
+    one cache can be shared between searches, of any pack. hits and misses count lookups to show how much rescoring is saved
+    Used by the list path of teambuilder.evolve, batched populations are scored faster than they are looked up
+    """
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = collections.OrderedDict()  # key -> (counts, points), least recently used first
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def context(bonus_traits: dict[str, int], bd: bool, data: GameData = GAME_DATA) -> tuple:
+        """
+        Returns the hashable search context that is part of every key, bonus traits as scored (see bonus_key)
+        """
+        return data.name, data.version, bonus_key(bonus_traits, data), bool(bd)
+
+    def get(self, key: tuple) -> tuple[list[int], int]:
+        """
+        Returns the (trait counts, points) of a key, or None if it is not cached
+        The counts are shared with the cache and must not be modified
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key: tuple, counts: list[int], points: int):
+        self._entries[key] = (counts, points)
+        if len(self._entries) > self.maxsize:  # evict the least recently used entry
+            self._entries.popitem(last=False)
+
+    def hit_rate(self) -> float:
+        """
+        Returns the share of lookups answered from the cache
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
@@ -0,0 +1,302 @@
+"""
+  Local HTTP service running team searches for several users
+  Searches run in a process pool, at most one per worker at a time, with a bounded queue of waiting searches.
+  Identical searches in flight are coalesced: they wait on the same run and get the same result.
+  Only the standard library is used, so the service runs offline. Endpoints:
+
+    POST /search   body: a search spec as in batch.py, e.g. {"core": ["Nunu", "Veigar"], "time_budget": 5}
+                   invalid specs (unknown or repeated units, wrong types, values out of bounds) get 400
+                   a search that fails in its worker gets 500 with the error, as batch.py reports it
+                   a spec may name the "pack" it plans for (default TFT_DATA_PACK), unknown packs get 400
+    GET /health    queue depth, counters, latency percentiles and the data packs served
+
+  Usage: python server.py [--host 127.0.0.1] [--port 8000] [--workers N] [--max-queue N] [--store PATH]
+"""
+
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import statistics
+import time
+
+from batch import run_spec, spec_pack
+from database import pack_units
+from gamedata import GAME_DATA, available_packs
+
+"""
+    Global Variables
+"""
+# seconds a search may run when its spec has no time_budget, and the most it may ask for
+DEFAULT_TIME_BUDGET = 10.0
+MAX_TIME_BUDGET = 60.0
+LATENCY_WINDOW = 1000  # latencies kept for the percentiles of /health
+MAX_BODY = 2**16
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+# the most a spec may ask for, so that one request cannot exhaust a worker's memory
+MAX_GENERATIONS = 10_000
+MAX_POPULATION_SIZE = 5_000
+MAX_TOP_K = 100
+# integer spec keys -> (smallest, largest) value, team_size is at most the number of units of the spec's pack
+INTEGER_BOUNDS = {
+    "generations": (1, MAX_GENERATIONS),
+    "population_size": (2, MAX_POPULATION_SIZE),
+    "team_size": (1, None),
+    "top_k": (1, MAX_TOP_K),
+    "stall_generations": (1, MAX_GENERATIONS),
+    "target_score": (0, None),
+    "seed": (None, None),
+}
+
+
+def validate_spec(spec: dict):
+    """
+    Raises ValueError if a search spec has an unknown pack, units or traits, wrong types or values out of bounds
+    Units and traits are looked up in the spec's pack. Keys missing from the spec take their defaults in batch.run_spec
+    """
+    if spec.get("pack") is not None and not isinstance(spec["pack"], str):
+        raise ValueError("pack must be a data pack name")
+    data = spec_pack(spec)
+    all_units = pack_units(data)
+
+    def units(names, key: str):
+        if not isinstance(names, list) or not all(isinstance(name, str) for name in names):
+            raise ValueError(f"{key} must be a list of unit names")
+        unknown = [name for name in names if name not in all_units]
+        if unknown:
+            raise ValueError(f"unknown units in {key}: {unknown}")
+
+    for key, (low, high) in dict(INTEGER_BOUNDS, team_size=(1, len(all_units))).items():
+        value = spec.get(key)
+        if value is None:
+            continue
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ValueError(f"{key} must be an integer")
+        if low is not None and value < low:
+            raise ValueError(f"{key} must be at least {low}")
+        if high is not None and value > high:
+            raise ValueError(f"{key} must be at most {high}")
+    for key in ("time_budget", "synergy_share"):
+        value = spec.get(key)
+        if value is not None and (not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0):
+            raise ValueError(f"{key} must be a non-negative number")
+    if spec.get("synergy_share") is not None and spec["synergy_share"] > 1:
+        raise ValueError("synergy_share must be at most 1")
+    for key in ("bd", "refine"):
+        if spec.get(key) is not None and not isinstance(spec[key], bool):
+            raise ValueError(f"{key} must be true or false")
+    if spec.get("core") is not None:
+        units(spec["core"], "core")
+        if len(set(spec["core"])) != len(spec["core"]):
+            raise ValueError("core units must be distinct")
+        if len(spec["core"]) > spec.get("team_size", 10):
+            raise ValueError("more core units than team slots")
+    bonus_traits = spec.get("bonus_traits")
+    if bonus_traits is not None:
+        if not isinstance(bonus_traits, dict) or not all(
+            isinstance(count, int) and not isinstance(count, bool) for count in bonus_traits.values()
+        ):
+            raise ValueError("bonus_traits must map trait names to integers")
+        unknown = [trait for trait in bonus_traits if trait not in data.trait_ids]
+        if unknown:
+            raise ValueError(f"unknown bonus traits: {unknown}")
+    seed_teams = spec.get("seed_teams")
+    if seed_teams is not None:
+        if not isinstance(seed_teams, list) or len(seed_teams) > spec.get("population_size", 500):
+            raise ValueError("seed_teams must be a list of at most population_size teams")
+        for team in seed_teams:
+            units(team, "seed_teams")
+
+
+class SearchService:
+    """
+    Runs search specs in a process pool with bounded concurrency, queueing and coalescing
+    """
+
+    def __init__(self, workers: int = os.cpu_count(), max_queue: int = 64, store_path: str = None):
+        self.pool = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        self.slots = asyncio.Semaphore(workers)
+        self.workers = workers
+        self.max_queue = max_queue
+        self.store_path = store_path
+        self.in_flight = {}  # normalized spec -> task running it
+        self.queued = self.running = 0
+        self.counters = collections.Counter()
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+
+    async def search(self, spec: dict) -> dict:
+        """
+        Returns the result of a spec (see batch.run_spec), or {"error": ...} if the search failed in its worker
+        Raises OverflowError if the queue is full and ValueError if the spec is invalid (see validate_spec)
+        """
+        validate_spec(spec)
+        spec = dict(spec)
+        request_id = spec.pop("id", None)
+        # the default pack is named so that specs with and without it are coalesced
+        spec["pack"] = GAME_DATA.name if spec.get("pack") is None else spec["pack"]
+        time_budget = spec.get("time_budget")
+        spec["time_budget"] = min(
+            float(DEFAULT_TIME_BUDGET if time_budget is None else time_budget), MAX_TIME_BUDGET
+        )
+        key = json.dumps(spec, sort_keys=True)
+        task = self.in_flight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            if self.queued >= self.max_queue:
+                self.counters["rejected"] += 1
+                raise OverflowError("search queue is full")
+            task = asyncio.ensure_future(self._run(spec))
+            self.in_flight[key] = task
+            task.add_done_callback(lambda _: self.in_flight.pop(key, None))
+        # shield so a client disconnecting doesn't cancel a run other clients wait on
+        result = dict(await asyncio.shield(task))
+        result["id"] = request_id
+        return result
+
+    async def _run(self, spec: dict) -> dict:
+        start = time.perf_counter()
+        self.queued += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.queued -= 1
+        self.running += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self.pool, run_spec, spec, self.store_path
+            )
+        except Exception as e:  # report the failed search like batch.py does
+            self.counters["failed"] += 1
+            return {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            self.running -= 1
+            self.slots.release()
+            self.counters["completed"] += 1
+            self.latencies.append(time.perf_counter() - start)
+
+    def health(self) -> dict:
+        """
+        Returns the state of the service and the 50th, 90th and 99th latency percentiles in seconds
+        """
+        if len(self.latencies) >= 2:
+            percentiles = statistics.quantiles(self.latencies, n=100, method="inclusive")
+            latency = {f"p{p}": percentiles[p - 1] for p in (50, 90, 99)}
+        else:
+            latency = {f"p{p}": self.latencies[0] if self.latencies else None for p in (50, 90, 99)}
+        return {
+            "status": "ok",
+            "packs": available_packs(),
+            "default_pack": [GAME_DATA.name, GAME_DATA.version],
+            "workers": self.workers,
+            "running": self.running,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            "in_flight": len(self.in_flight),
+            **{name: self.counters[name] for name in ("completed", "coalesced", "rejected", "failed")},
+            "latency": latency,
+        }
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def read_request(reader: asyncio.StreamReader) -> tuple[str, str, bytes]:
+    """
+    Returns the method, path and body of an HTTP request, raises ValueError if it is malformed
+    """
+    request_line = (await reader.readline()).decode("latin-1").split()
+    if len(request_line) != 3:
+        raise ValueError("malformed request line")
+    method, path, _ = request_line
+    length = 0
+    while True:
+        line = (await reader.readline()).decode("latin-1").strip()
+        if not line:
+            break
+        name, _, value = line.partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    if not 0 <= length <= MAX_BODY:
+        raise ValueError("bad content length")
+    return method, path.split("?")[0], await reader.readexactly(length)
+
+
+async def handle(service: SearchService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    """
+    Serves one request per connection
+    """
+    try:
+        try:
+            method, path, body = await read_request(reader)
+            if method == "GET" and path == "/health":
+                status, response = 200, service.health()
+            elif method == "POST" and path == "/search":
+                spec = json.loads(body or b"{}")
+                if not isinstance(spec, dict):
+                    raise ValueError("the search spec must be a JSON object")
+                response = await service.search(spec)
+                status = 500 if "error" in response else 200
+            else:
+                status, response = 404, {"error": f"no endpoint {method} {path}"}
+        except (ValueError, asyncio.IncompleteReadError) as e:  # json.JSONDecodeError is a ValueError
+            status, response = 400, {"error": str(e)}
+        except OverflowError as e:
+            status, response = 503, {"error": str(e)}
+        data = json.dumps(response).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\nConnection: close\r\n\r\n".encode()
+            + data
+        )
+        await writer.drain()
+    except ConnectionError:
+        pass  # client went away
+    finally:
+        writer.close()
+
+
+async def serve(host: str, port: int, service: SearchService):
+    server = await asyncio.start_server(
+        lambda reader, writer: handle(service, reader, writer), host, port
+    )
+    print(f"Serving on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        service.close()
+
+
+def main(argv: list[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1].strip())
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="number of worker processes"
+    )
+    parser.add_argument(
+        "--max-queue", type=int, default=64, help="searches waiting for a worker before requests are rejected"
+    )
+    parser.add_argument("--store", help="result store database, see resultstore.py")
+    args = parser.parse_args(argv)
+
+    async def run():
+        await serve(args.host, args.port, SearchService(args.workers, args.max_queue, args.store))
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
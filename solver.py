@@ -0,0 +1,174 @@
+"""
+  Exact branch-and-bound solver for the team comp problem
+  calculate_points only depends on the multiset of trait sets on the team, so units with identical (scored) traits are
+  grouped into symmetric classes and the search branches on how many units to take from each class.
+  Branches are pruned with an upper bound on the breakpoints that the remaining slots can still reach.
+"""
+
+import heapq
+import itertools
+
+from database import pack_unique_traits, pack_units, Unit
+from gamedata import GAME_DATA, GameData
+from scoring import points_table
+
+
+def _unit_classes(
+    candidates: list[str], most_traits_first: bool, data: GameData = GAME_DATA
+) -> list[tuple[tuple[int, ...], list[str]]]:
+    """
+    Groups candidate unit names by their scored traits
+    Returns [(trait indices, unit names)] ordered by number of traits
+    """
+    all_units = pack_units(data)
+    classes = {}
+    for name in candidates:
+        traits = tuple(
+            sorted(
+                t
+                for t in data.unit_traits[all_units[name].id]
+                if t < data.scored_traits
+            )
+        )
+        classes.setdefault(traits, []).append(name)
+    for names in classes.values():
+        names.sort(key=lambda name: (all_units[name].cost, name))  # representatives are the cheapest units
+    return sorted(
+        classes.items(),
+        key=lambda item: (-len(item[0]) if most_traits_first else len(item[0]), item[1][0]),
+    )
+
+
+def solve_exact(
+    team_size: int = 10,
+    bonus_traits: dict[str, int] = None,
+    included_units: list[str] = None,
+    bd: bool = False,
+    top_k: int = 1,
+    data: GameData = GAME_DATA,
+) -> list[tuple[list[Unit], int]]:
+    """
+    Returns the provably best top_k teams as [(team, points)], best first
+    If Build Different, the best teams have the least points and units with unique traits are excluded
+    Teams that only differ by swapping units with identical traits are symmetric and returned once
+    data - data pack to plan for (see gamedata.load_pack)
+    """
+    all_units, unique_traits = pack_units(data), pack_unique_traits(data)
+    included_units = [name for name in dict.fromkeys(included_units or []) if name in all_units]
+    if len(included_units) > team_size:
+        raise ValueError("more core units than team slots")
+    candidates = [
+        name
+        for name in all_units
+        if name not in included_units
+        and not (bd and any(trait in unique_traits for trait in all_units[name].traits))
+    ]
+    slots = team_size - len(included_units)
+    if slots > len(candidates):
+        raise ValueError("not enough units to fill the team")
+
+    classes = _unit_classes(candidates, most_traits_first=not bd, data=data)
+    class_traits = [traits for traits, _ in classes]
+    class_sizes = [len(names) for _, names in classes]
+    # shared score table with the bonus traits folded in, indexed by the number of units with the trait
+    table = points_table(bonus_traits, data)
+    scored_traits = data.scored_traits
+    # unit counts at which each trait reaches its next breakpoint (the breakpoints shifted by the bonus traits)
+    steps = [
+        [count for count in range(1, len(row)) if row[count] > row[count - 1]] for row in table
+    ]
+
+    # suffix tables for bounds: units still available per trait, units left, and their trait totals (best first)
+    trait_avail = [[0] * scored_traits for _ in range(len(classes) + 1)]
+    units_left = [0] * (len(classes) + 1)
+    for k in range(len(classes) - 1, -1, -1):
+        trait_avail[k] = trait_avail[k + 1].copy()
+        for t in class_traits[k]:
+            trait_avail[k][t] += class_sizes[k]
+        units_left[k] = units_left[k + 1] + class_sizes[k]
+    # classes are ordered by number of traits, so the first r remaining units hold the most traits (maximizing)
+    gain_prefix = []
+    for k in range(len(classes) + 1):
+        gains = [0]
+        for j in range(k, len(classes)):
+            for _ in range(class_sizes[j]):
+                gains.append(gains[-1] + len(class_traits[j]))
+        gain_prefix.append(gains)
+
+    # start from the core units
+    counts = [0] * scored_traits
+    for name in included_units:
+        for t in data.unit_traits[all_units[name].id]:
+            if t < scored_traits:
+                counts[t] += 1
+    score = sum(table[t][c] for t, c in enumerate(counts))
+
+    best = []  # heap of (sign * points, tiebreak, class takes), worst kept team on top
+    sign = -1 if bd else 1
+    tiebreak = itertools.count()
+    takes = [0] * len(classes)
+
+    def bound(k: int, remaining: int, score: int) -> int:
+        # every breakpoint still reachable costs (breakpoint - previous count) trait increments, and the remaining
+        # slots can add at most gain_prefix[k][remaining] increments, so take the cheapest breakpoints first
+        budget = gain_prefix[k][remaining]
+        costs = []
+        for t, count in enumerate(counts):
+            reach = count + min(remaining, trait_avail[k][t])
+            previous = count
+            for bp in steps[t]:
+                if bp > reach:
+                    break
+                if bp > count:
+                    costs.append(bp - previous)
+                    previous = bp
+        costs.sort()
+        gain = 0
+        for cost in costs:
+            budget -= cost
+            if budget < 0:
+                break
+            gain += 1
+        return score + gain
+
+    def prune(k: int, remaining: int, score: int) -> bool:
+        if len(best) < top_k:
+            return False
+        worst_kept = best[0][0] * sign
+        if bd:
+            return score >= worst_kept  # points can only increase as units are added
+        return bound(k, remaining, score) <= worst_kept
+
+    def search(k: int, remaining: int, score: int):
+        if remaining == 0:
+            entry = (sign * score, next(tiebreak), takes.copy())
+            if len(best) < top_k:
+                heapq.heappush(best, entry)
+            else:
+                heapq.heappushpop(best, entry)
+            return
+        if units_left[k] < remaining or prune(k, remaining, score):
+            return
+        traits = class_traits[k]
+        # try taking the most units of this class first so good teams are found early
+        for take in range(min(class_sizes[k], remaining), -1, -1):
+            delta = 0
+            for t in traits:
+                delta += table[t][counts[t] + take] - table[t][counts[t]]
+            for t in traits:
+                counts[t] += take
+            takes[k] = take
+            search(k + 1, remaining - take, score + delta)
+            for t in traits:
+                counts[t] -= take
+        takes[k] = 0
+
+    search(0, slots, score)
+
+    results = []
+    for signed, _, class_takes in sorted(best, key=lambda entry: (-entry[0], entry[1])):
+        team = [all_units[name] for name in included_units]
+        for (_, names), take in zip(classes, class_takes):
+            team.extend(all_units[name] for name in names[:take])
+        results.append((team, signed * sign))
+    return results
@@ -5,10 +5,33 @@
 """
 
 import collections
+import concurrent.futures
+import dataclasses
+import functools
+import json
+import os
 import random
+import threading
 import time
+from typing import Callable
 
-from database import all_units, traits_breakpoints_units, unique_traits, Unit
+import numpy as np
+
+import breeding
+from database import pack_unique_traits, pack_units, Unit
+from gamedata import GAME_DATA, GameData, load_pack
+from scoring import (
+    FitnessCache,
+    apply_delta,
+    encode_population,
+    points_table,
+    score_population,
+    score_table,
+    team_mask,
+    tables,
+    trait_counts,
+)
+from solver import solve_exact
 
 """
     Global Variables
@@ -17,88 +40,244 @@ from database import all_units, traits_breakpoints_units, unique_traits, Unit
 MUTATION_RATE = 0.1
 # factor by which the population is selected for the next generation
 SELECTION_FACTOR = 2
+# number of teams competing for each parent in tournament selection
+TOURNAMENT_SIZE = 3
+# adaptive rates move between their base value and these bounds as the population diversity drops
+MAX_MUTATION_RATE = 0.6
+MIN_CROSSOVER_RATE = 0.5
+# generations between diversity measurements of adaptive operators
+ADAPT_INTERVAL = 10
+# share of guided mutations that fall back to a uniformly random replacement, to keep exploring
+GUIDED_EXPLORATION = 0.3
+# extra weight of a candidate unit per breakpoint it completes in guided mutation
+GUIDED_WEIGHT = 4
+# number of random candidate units weighed by guided mutation
+GUIDED_CANDIDATES = 8
+# share of the initial population built greedily for trait synergy, the rest is random
+SYNERGY_SHARE = 0.2
+# number of best units each greedy slot picks from at random
+SYNERGY_CHOICES = 3
+# weight of a breakpoint against a shared trait when building synergy teams
+SYNERGY_BREAKPOINT = 8
+# reasons a search stops
+STOP_GENERATIONS = "generation limit reached"
+STOP_STALL = "best score stalled"
+STOP_TARGET = "target score reached"
+STOP_TIME = "time budget exhausted"
+STOP_DIVERSITY = "population diversity too low"
+STOP_CANCELLED = "cancelled"
+# timed phases of a generation in a SearchTrace record
+TRACE_PHASES = (
+    "rank_time",
+    "selection_time",
+    "crossover_time",
+    "mutate_time",
+    "delta_time",
+)
+
+
+@dataclasses.dataclass
+class SearchResult:
+    """
+    Outcome of run_search: the best team, its points, and when and why the search stopped
+    """
+
+    team: list[Unit]
+    points: int
+    generation: int
+    stop_reason: str
+    runtime: float
+    # hall of fame as [(team, points)], best first
+    teams: list[tuple[list[Unit], int]] = dataclasses.field(default_factory=list)
 
+    def page(self, number: int, size: int = 5) -> list[tuple[list[Unit], int]]:
+        """
+        Returns the number-th page (starting at 0) of the hall of fame
+        """
+        return self.teams[number * size : (number + 1) * size]
 
-def calculate_points(team: list[Unit], bonus_traits: dict[str, int]) -> int:
+
+def calculate_points(team: list[Unit], bonus_traits: dict[str, int], data: GameData = GAME_DATA) -> int:
     """
     Determines and returns the value of a team
     bonus_traits is structured like {"Frost" : 3, ...}
+    data - data pack of the team's units (see gamedata.load_pack)
     """
-    trait_counter = collections.defaultdict(int)  # avoid KeyError
-
-    # count traits in team
+    # trait counts indexed by trait id, only traits with breakpoints (i.e. not unique traits) are counted
+    trait_counter = [0] * data.scored_traits
+    unit_traits = tables(data).unit_traits
     for unit in team:
-        for trait in unit.traits:
-            if trait not in unique_traits:  # ignore unique traits
-                trait_counter[trait] += 1
-
-    # count bonus traits
-    if bonus_traits:
-        for trait, count in bonus_traits.items():
-            if trait not in unique_traits:  # ignore unique traits
-                trait_counter[trait] += 1
-
-    # point scoring algorithm: add a point for every breakpoint reached in all traits
-    points = 0
-    for trait, count in trait_counter.items():
-        if trait in traits_breakpoints_units:
-            for bp in traits_breakpoints_units[trait][0]:
-                if count >= bp:
-                    points += 1
-                else:
-                    break
+        for trait in unit_traits[unit.id]:
+            trait_counter[trait] += 1
+
+    # point scoring algorithm: a point for every breakpoint reached in all traits, looked up in the score table
+    # (which includes the bonus traits)
+    return sum(row[count] for row, count in zip(points_table(bonus_traits, data), trait_counter))
+
+
+@functools.lru_cache(maxsize=None)
+def unit_pool(data: GameData, bd: bool) -> list[Unit]:
+    """
+    Returns the units of a data pack sampled by the genetic algorithm
+    if Built Different, exclude units with unique traits (since they don't proc the buff)
+    """
+    unique_traits = pack_unique_traits(data)
+    return [
+        unit
+        for unit in pack_units(data).values()
+        if not (bd and any(trait in unique_traits for trait in unit.traits))
+    ]
+
+
+class CandidatePool:
+    """
+    Eligible units for one search, computed once so that sampling draws indices instead of rebuilding dicts
+    core - included units that can be part of a random team (Built Different excludes units with unique traits)
+    others - eligible units that are not included units, used to fill and mutate teams
+    data - data pack the units come from, which the search scores teams with
+    """
 
-    return points
+    def __init__(self, included_units: list[str], bd: bool, data: GameData = GAME_DATA):
+        self.data = data
+        eligible = unit_pool(data, bd)
+        included = dict.fromkeys(included_units or [])  # repeated names are one core unit, in order
+        self.included = [pack_units(data)[name] for name in included]
+        self.included_set = set(self.included)
+        self.core = [unit for unit in self.included if unit in eligible]
+        self.others = [unit for unit in eligible if unit.name not in included]
+        self.others_set = set(self.others)
+
+    def sample_other(self, team: list[Unit]) -> Unit:
+        """
+        Returns a random unit of others that is not on team, or None if there is none
+        """
+        if sum(unit in self.others_set for unit in team) >= len(self.others):
+            return None
+        while True:  # rejection sampling, teams are small compared to the pool
+            unit = self.others[random.randrange(len(self.others))]
+            if unit not in team:
+                return unit
 
 
 def generate_random_team(
-    included_units: list[str], bd: bool, team_size: int
+    included_units: list[str], bd: bool, team_size: int, pool: CandidatePool = None
 ) -> list[Unit]:
     """
     Randomly generate and return a candidate team
     included_units is a list of unit names
     bd - True if "Built Different II" is selected as an augment. Otherwise False
+    pool - candidate units of the search, built from included_units and bd if not given
     """
-    # if Built Different, exclude units with unique traits (since they don't proc the buff)
-    available_units = (
-        all_units.copy()
-        if not bd
-        else {
-            unit: all_units[unit]
-            for unit in all_units
-            if not any(
-                trait in all_units[unit].traits for trait in unique_traits
-            )  # iterate units and check that none of their traits match the dictionary of unique traits
-        }
-    )
-
-    # generate team
-    team = []
+    if pool is None:
+        pool = CandidatePool(included_units, bd)
 
     # included units are part of the team
-    if included_units:
-        for unit in included_units:
-            if unit in available_units:
-                team.append(available_units[unit])
-                del available_units[unit]  # avoid adding duplicate units
+    team = pool.core.copy()
 
     # fill in the remaining team randomly
+    team.extend(random.sample(pool.others, max(team_size - len(team), 0)))
+    return team
+
+
+def generate_synergy_team(
+    included_units: list[str],
+    bd: bool,
+    team_size: int,
+    pool: CandidatePool = None,
+    bonus_traits: dict[str, int] = None,
+) -> list[Unit]:
+    """
+    Greedily generate and return a candidate team with trait synergy around the included units
+    After a random first unit (so that teams differ), every slot takes one of the SYNERGY_CHOICES units reaching the
+    most breakpoints, then sharing the most traits with the team (the fewest of both if Built Different)
+    """
+    if pool is None:
+        pool = CandidatePool(included_units, bd)
+    team = pool.core.copy()
+    candidates = pool.others.copy()
+    if team_size - len(team) > len(candidates):
+        raise ValueError("not enough units to fill the team")
+    random.shuffle(candidates)
+    pack = tables(pool.data)
+    table = score_table(bonus_traits, pool.data)
+    gains = np.diff(table, axis=1, append=table[:, -1:])  # points gained by one more unit of a trait
+    incidence = pack.incidence[[unit.id for unit in candidates]]
+    counts = pack.incidence[[unit.id for unit in team]].sum(axis=0)
+    # a breakpoint outweighs any number of shared traits (a unit has fewer than SYNERGY_BREAKPOINT traits)
+    sign = -SYNERGY_BREAKPOINT if bd else SYNERGY_BREAKPOINT
+    available = np.ones(len(candidates), dtype=bool)
     while len(team) < team_size:
-        new_unit = random.choice(list(available_units.keys()))
-        team.append(available_units[new_unit])
-        del available_units[new_unit]
+        if len(team) == len(pool.core):
+            choice = len(team) - len(pool.core)  # candidates are shuffled, so this is a random unit
+        else:
+            synergy = incidence @ (sign * gains[pack.trait_range, counts] + np.sign(sign) * (counts > 0))
+            synergy = np.where(available, synergy, np.iinfo(synergy.dtype).min)
+            choices = min(SYNERGY_CHOICES, available.sum())
+            choice = random.choice(np.argpartition(synergy, -choices)[-choices:].tolist())
+        available[choice] = False
+        counts += incidence[choice]
+        team.append(candidates[choice])
     return team
 
 
+def fit_team(team: list[Unit], team_size: int, pool: CandidatePool) -> list[Unit]:
+    """
+    Returns a caller-supplied team (e.g. the board in the UI) as a candidate team of the search
+    Core units come first, then the team's other eligible units without duplicates, trimmed or filled at random up
+    to team_size
+    """
+    fitted = pool.core.copy()
+    for unit in team:
+        if len(fitted) < team_size and unit in pool.others_set and unit not in fitted:
+            fitted.append(unit)
+    fitted.extend(
+        random.sample(
+            [unit for unit in pool.others if unit not in fitted],
+            max(team_size - len(fitted), 0),
+        )
+    )
+    return fitted
+
+
+def seed_population(
+    population_size: int,
+    included_units: list[str],
+    bd: bool,
+    team_size: int,
+    pool: CandidatePool = None,
+    bonus_traits: dict[str, int] = None,
+    synergy_share: float = SYNERGY_SHARE,
+    seed_teams: list[list[Unit]] = None,
+) -> list[list[Unit]]:
+    """
+    Returns the initial population of a search: the caller's seed_teams (see fit_team), a synergy_share of greedy
+    synergy teams (see generate_synergy_team) and random teams for the rest, population_size teams in total
+    Raises ValueError if no team can be generated
+    """
+    if pool is None:
+        pool = CandidatePool(included_units, bd)
+    population = [fit_team(team, team_size, pool) for team in seed_teams or []][:population_size]
+    synergy = min(int(population_size * synergy_share), population_size - len(population))
+    population.extend(
+        generate_synergy_team(included_units, bd, team_size, pool, bonus_traits)
+        for _ in range(synergy)
+    )
+    population.extend(
+        generate_random_team(included_units, bd, team_size, pool)
+        for _ in range(population_size - len(population))
+    )
+    return population
+
+
 def crossover(team1: list[Unit], team2: list[Unit]) -> list[Unit]:
     """
     Pick from two teams pseudo-randomly to return a "superior" team
     """
-    # use bitwise operators to identify the common units
+    # identify the common units, iterating the teams (rather than sets) keeps the order reproducible for a given seed
     set1, set2 = set(team1), set(team2)
-    common = set1 & set2
-    only1, only2 = list(set1 - common), list(set2 - common)  # we choose from these sets
-    new_team = list(common)
+    new_team = [unit for unit in team1 if unit in set2]
+    only1 = [unit for unit in team1 if unit not in set2]  # we choose from these lists
+    only2 = [unit for unit in team2 if unit not in set1]
 
     # add units
     while len(new_team) < len(
@@ -113,96 +292,920 @@ def crossover(team1: list[Unit], team2: list[Unit]) -> list[Unit]:
     return new_team
 
 
-def mutate(team: list[Unit], included_units: list[str], bd: bool = False) -> list[Unit]:
+def mutate(
+    team: list[Unit],
+    included_units: list[str],
+    bd: bool = False,
+    pool: CandidatePool = None,
+    rate: float = MUTATION_RATE,
+    bonus_traits: dict[str, int] = None,
+) -> list[Unit]:
     """
     Add genetic diversity to team comps by randomly replacing a unit
+    pool - candidate units of the search, built from included_units and bd if not given
+    rate - chance that a unit is replaced
+    bonus_traits - bonus traits of the search, unused by random replacement (see guided_mutate)
     """
+    if pool is None:
+        pool = CandidatePool(included_units, bd)
+
     # remove included units before mutating randomly
-    if included_units:
-        for unit in team.copy():  # copy so we don't iterate while updating team
-            if unit.name in included_units:
-                team.remove(unit)
-
-    if random.random() < MUTATION_RATE:
-        # get units that are not already on the team and not included_units to avoid duplicates
-        other_units = {
-            unit: all_units[unit]
-            for unit in all_units
-            if all_units[unit] not in team
-            and (not included_units or unit not in included_units)
+    if pool.included:
+        team = [unit for unit in team if unit not in pool.included_set]
+
+    if random.random() < rate and team:
+        # get a unit that is not already on the team and not an included unit to avoid duplicates
+        new_unit = pool.sample_other(team)
+        if new_unit is not None:
+            # randomly replace a unit with another one to encourage diversity
+            team[random.randrange(len(team))] = new_unit
+
+    # add included units back (the core: Built Different leaves out included units with unique traits)
+    for new_unit in pool.core:
+        if new_unit not in team:
+            team.append(new_unit)
+
+    return team
+
+
+def guided_mutate(
+    team: list[Unit],
+    included_units: list[str],
+    bd: bool = False,
+    pool: CandidatePool = None,
+    rate: float = MUTATION_RATE,
+    bonus_traits: dict[str, int] = None,
+) -> list[Unit]:
+    """
+    Trait-aware mutate: replaces a unit that activates no breakpoint with a unit likely to reach one
+    The outgoing unit is drawn among the units whose traits keep their breakpoints without them. The incoming unit is
+    weighted by the breakpoints it completes and by the traits it shares with the team. Breakpoints count the
+    bonus traits, as in calculate_points
+    Falls back to mutate with probability GUIDED_EXPLORATION, and if Built Different (where fewer traits are better)
+    """
+    if bd or random.random() < GUIDED_EXPLORATION:
+        return mutate(team, included_units, bd, pool, rate, bonus_traits)
+    if pool is None:
+        pool = CandidatePool(included_units, bd)
+    if random.random() >= rate or len(team) == len(pool.core) or not pool.others:
+        return mutate(team, included_units, bd, pool, 0.0, bonus_traits)
+
+    table = points_table(bonus_traits, pool.data)
+    unit_traits = tables(pool.data).unit_traits
+    counts = [0] * pool.data.scored_traits
+    for unit in team:
+        for trait in unit_traits[unit.id]:
+            counts[trait] += 1
+    team = [unit for unit in team if unit not in pool.included_set]
+    # units without which every trait keeps its breakpoints
+    idle = [
+        slot
+        for slot, unit in enumerate(team)
+        if all(table[t][counts[t]] == table[t][counts[t] - 1] for t in unit_traits[unit.id])
+    ]
+    slot = random.choice(idle) if idle else random.randrange(len(team))
+    for trait in unit_traits[team[slot].id]:
+        counts[trait] -= 1
+
+    # weigh a few random candidates rather than the whole pool
+    on_team = set(team)
+    candidates = [
+        unit
+        for unit in dict.fromkeys(random.choices(pool.others, k=GUIDED_CANDIDATES))
+        if unit not in on_team
+    ]
+    if candidates:
+        weights = [
+            1
+            + sum(
+                GUIDED_WEIGHT * (table[t][counts[t] + 1] - table[t][counts[t]]) + (counts[t] > 0)
+                for t in unit_traits[unit.id]
+            )
+            for unit in candidates
+        ]
+        team[slot] = random.choices(candidates, weights)[0]
+    team.extend(pool.core)
+    return team
+
+
+def truncation_selection(
+    scores: np.ndarray, elites: int, count: int, bd: bool
+) -> list[tuple[int, int]]:
+    """
+    Returns count pairs of distinct parents drawn uniformly from the elites, the best teams ranked at the head of
+    scores. Pairs are drawn in one vectorized pass, seeded from random like tournament_selection
+    """
+    rng = np.random.default_rng(random.getrandbits(64))
+    survivors = max(elites, 2)
+    first = rng.integers(survivors, size=count)
+    second = rng.integers(survivors - 1, size=count)
+    second += second >= first  # skip the first parent
+    return np.stack([first, second], axis=1).tolist()
+
+
+def tournament_selection(
+    scores: np.ndarray, elites: int, count: int, bd: bool
+) -> list[tuple[int, int]]:
+    """
+    Returns count pairs of parents, each the best of TOURNAMENT_SIZE teams drawn from the whole population
+    The population does not need to be ranked. Tournaments are drawn in one vectorized pass, seeded from random so
+    that random.seed keeps searches reproducible
+    """
+    rng = np.random.default_rng(random.getrandbits(64))
+    contestants = rng.integers(len(scores), size=(count * 2, TOURNAMENT_SIZE))
+    contested = scores[contestants] if bd else -scores[contestants]
+    winners = contestants[np.arange(count * 2), contested.argmin(axis=1)]
+    return winners.reshape(count, 2).tolist()
+
+
+@dataclasses.dataclass
+class Operators:
+    """
+    Pluggable operators and rates of the genetic algorithm (see evolve)
+    select(scores, elites, count, bd) - returns count (parent, parent) index pairs, e.g. truncation_selection
+    crossover(team1, team2) and mutate(team, included_units, bd, pool, rate, bonus_traits) - as crossover and mutate
+    elitism - share of the best teams carried over unchanged to the next generation
+    mutation_rate - chance that a child is mutated
+    crossover_rate - chance that a child is the crossover of its parents rather than a copy of its first parent
+    adaptive - if True, rates follow the population diversity (see rates)
+    batched - if True, the population is stored as an array of unit ids and every generation is bred at once by
+    breeding.breed, which replaces the crossover and mutate functions
+    dedup - handling of children identical to a team of their generation: None keeps them, breeding.DEDUP_REJECT
+    breeds them again from other parents and breeding.DEDUP_MUTATE mutates them (up to breeding.DEDUP_ATTEMPTS times)
+    """
+
+    select: Callable[[np.ndarray, int, int, bool], list[tuple[int, int]]] = truncation_selection
+    crossover: Callable[[list[Unit], list[Unit]], list[Unit]] = crossover
+    mutate: Callable[..., list[Unit]] = mutate
+    elitism: float = 1 / SELECTION_FACTOR
+    mutation_rate: float = MUTATION_RATE
+    crossover_rate: float = 1.0
+    adaptive: bool = False
+    batched: bool = False
+    dedup: str = None
+
+    def elites(self, population_size: int) -> int:
+        return max(int(population_size * self.elitism), 1)
+
+    def rates(self, diversity: float) -> tuple[float, float]:
+        """
+        Returns the mutation and crossover rates for a population diversity (see diversity)
+        Adaptive rates move linearly from their base values (every team unique) to MAX_MUTATION_RATE and
+        MIN_CROSSOVER_RATE (every team the same): mutation restores diversity, crossover of identical parents is wasted
+        """
+        if not self.adaptive:
+            return self.mutation_rate, self.crossover_rate
+        return (
+            self.mutation_rate + (MAX_MUTATION_RATE - self.mutation_rate) * (1 - diversity),
+            MIN_CROSSOVER_RATE + (self.crossover_rate - MIN_CROSSOVER_RATE) * diversity,
+        )
+
+
+# the original algorithm: the best half survives and breeds uniformly
+TRUNCATION = Operators()
+# the original algorithm with trait-aware mutation
+GUIDED = Operators(mutate=guided_mutate, mutation_rate=0.3)
+# tournament selection with a few elites and diversity-driven rates
+TOURNAMENT = Operators(
+    select=tournament_selection, elitism=0.2, mutation_rate=0.2, adaptive=True
+)
+# the original algorithm on an array-backed population, mutating children that duplicate a team of their generation
+BATCHED = Operators(batched=True, dedup=breeding.DEDUP_MUTATE)
+
+
+class HallOfFame:
+    """
+    Bounded collection of the best distinct teams seen across all generations
+    Every pair of kept teams is at least min_distance apart, measured as the Hamming distance of their bitmasks
+    (swapping one unit is a distance of 2). If Built Different, teams with less points are better
+    """
+
+    def __init__(self, size: int = 10, min_distance: int = 2, bd: bool = False):
+        self.size = size
+        self.min_distance = min_distance
+        self.sign = -1 if bd else 1
+        self.entries = []  # [(points, mask, team)], best first
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def offer(self, team: list[Unit], points: int) -> bool:
+        """
+        Adds the team if it is good enough and far enough from every better team. Returns True if added
+        """
+        points = int(points)
+        if len(self.entries) == self.size and points * self.sign <= self.entries[-1][0] * self.sign:
+            return False
+        mask = team_mask(team)
+        close = [
+            entry
+            for entry in self.entries
+            if (entry[1] ^ mask).bit_count() < self.min_distance
+        ]
+        if any(entry[0] * self.sign >= points * self.sign for entry in close):
+            return False
+        # the new team replaces the worse teams that are too close to it
+        self.entries = [entry for entry in self.entries if entry not in close]
+        self.entries.append((points, mask, team.copy()))
+        self.entries.sort(key=lambda entry: -entry[0] * self.sign)
+        del self.entries[self.size :]
+        return True
+
+    def update(self, population: list[list[Unit]], scores: np.ndarray):
+        """
+        Offers the teams of a ranked population, stopping at the first team that cannot qualify
+        """
+        for team, points in zip(population, scores):
+            if (
+                len(self.entries) == self.size
+                and points * self.sign <= self.entries[-1][0] * self.sign
+            ):
+                break
+            self.offer(team, points)
+
+    def teams(self) -> list[tuple[list[Unit], int]]:
+        """
+        Returns the kept teams as [(team, points)], best first
+        """
+        return [(team, points) for points, _, team in self.entries]
+
+
+class SearchTrace:
+    """
+    Optional instrumentation of evolve, costs nothing when no trace is passed
+    Every generation produces a record with the time spent ranking, selecting parents, in crossover, in mutate and
+    scoring children (by delta, or in one pass if batched), the best and mean points, the population diversity, the
+    children that duplicated a team of their generation (see Operators.dedup), the operator rates and helper call
+    counts.
+    Records are kept in records, passed to callback(record) and written as JSON Lines to path if given
+    """
+
+    def __init__(self, callback: Callable[[dict], None] = None, path: str = None):
+        self.callback = callback
+        self.records = []
+        self.calls = collections.Counter()  # helper -> calls over the whole search
+        self._file = open(path, "w") if path else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def record(self, record: dict):
+        self.records.append(record)
+        self.calls.update(record["calls"])
+        if self.callback is not None:
+            self.callback(record)
+        if self._file is not None:
+            self._file.write(json.dumps(record) + "\n")
+
+    def summary(self) -> dict:
+        """
+        Returns the total time per phase, the share of duplicate children and the total helper call counts
+        """
+        children = sum(record["children"] for record in self.records)
+        duplicates = sum(record["duplicates"] for record in self.records)
+        return {
+            "generations": len(self.records),
+            **{
+                phase: sum(record[phase] for record in self.records)
+                for phase in TRACE_PHASES
+            },
+            "duplicates": duplicates,
+            "unresolved": sum(record["unresolved"] for record in self.records),
+            "duplicate_rate": duplicates / children if children else 0.0,
+            "calls": dict(self.calls),
         }
-        # exclude units with unique traits
-        if bd:
-            other_units = {
-                unit: other_units[unit]
-                for unit in other_units
-                if not any(trait in other_units[unit].traits for trait in unique_traits)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def rank_order(
+    scores: np.ndarray, bd: bool, count: int = None, head: int = None
+) -> np.ndarray:
+    """
+    Returns the indices that sort scores from best to worst team (stable, so ties keep their order)
+    If Build Different, we want the least number of traits (and exlude unique traits)
+    count - only rank the best count teams, the others follow in no particular order. This partitions in linear time
+    instead of sorting the whole population
+    head - the best head teams (e.g. the elites) come first, ranked only up to count
+    """
+    keys = scores if bd else -scores
+    if count is None or count >= len(scores):
+        return np.argsort(keys, kind="stable")
+    order = np.argpartition(keys, count - 1)
+    if head is not None and count < head < len(scores):
+        rest = order[count:]
+        order[count:] = rest[np.argpartition(keys[rest], head - count - 1)]
+    order[:count] = order[:count][np.argsort(keys[order[:count]], kind="stable")]
+    return order
+
+
+def rank_population(
+    population: list[list[Unit]],
+    bonus_traits: dict[str, int],
+    bd: bool,
+    data: GameData = GAME_DATA,
+) -> tuple[list[list[Unit]], np.ndarray]:
+    """
+    Returns the population sorted from best to worst team along with the sorted scores
+    """
+    scores = score_population(encode_population(population, data), bonus_traits, data)
+    order = rank_order(scores, bd)
+    return [population[i] for i in order], scores[order]
+
+
+def diversity(population: list[list[Unit]]) -> float:
+    """
+    Returns the share of distinct teams in the population (1.0 means every team is unique)
+    """
+    if not population:
+        return 0.0
+    return len({team_mask(team) for team in population}) / len(population)
+
+
+def evolve(
+    population: list[list[Unit]],
+    generations: int,
+    population_size: int,
+    bonus_traits: dict[str, int],
+    included_units: list[str],
+    bd: bool,
+    stall_generations: int = None,
+    target_score: int = None,
+    deadline: float = None,
+    min_diversity: float = None,
+    pool: CandidatePool = None,
+    hall_of_fame: HallOfFame = None,
+    progress: Callable[[int, list[Unit], int], None] = None,
+    progress_interval: int = 10,
+    cancel: threading.Event = None,
+    trace: SearchTrace = None,
+    operators: Operators = BATCHED,
+    cache: FitnessCache = None,
+) -> tuple[list[list[Unit]], str, int]:
+    """
+    Runs the genetic algorithm on population for up to a number of generations
+    Returns the new population, the reason the search stopped, and the number of generations run
+    The optional convergence criteria are checked on the ranked population at the start of every generation:
+    stall_generations - stop once the best score has not improved for this many generations
+    target_score - stop once the best score reaches it (at most it, if Built Different)
+    deadline - stop once time.monotonic() passes it
+    min_diversity - stop once diversity() of the population falls below it
+    pool - candidate units of the search, built from included_units and bd if not given. Teams are scored with its
+    data pack
+    hall_of_fame - optional HallOfFame updated with the ranked population of every generation
+    progress - called as progress(generation, best team, best points) every progress_interval generations
+    cancel - stop as soon as this event is set (e.g. from a UI thread)
+    trace - optional SearchTrace receiving per-generation timings and statistics
+    operators - selection, crossover and mutation of the search (see Operators)
+    cache - optional FitnessCache of the list path, bred teams found in it are not scored again
+    Only the best team (and hall of fame candidates) are ranked, the other elites follow them unordered, so the
+    returned population is sorted from best to worst only at its head
+    """
+    if pool is None:
+        pool = CandidatePool(included_units, bd)
+    data = pool.data
+    elites = operators.elites(population_size)
+    # only the best team and the hall of fame candidates are ranked (and decoded if batched), the other elites only
+    # need to be at the head of the population
+    ranked = max(1, 0 if hall_of_fame is None else hall_of_fame.size)
+    rates = operators.rates(1.0)
+    if operators.batched:
+        # teams are rows of unit ids, only the ranked head is decoded into Unit lists every generation
+        teams = breeding.to_array(population)
+        scores = score_population(teams, bonus_traits, data)
+        eligible, included = breeding.unit_mask(pool.others, data), breeding.unit_mask(pool.included, data)
+    else:
+        # teams carry their trait counts and points, children are then scored from a parent by delta (see _breed)
+        encoded = encode_population(population, data)
+        scores = score_population(encoded, bonus_traits, data).tolist()
+        counts = trait_counts(encoded, bonus_traits, data).tolist()
+    best_points, stalled = None, 0
+    stop_reason = STOP_GENERATIONS
+    for generation in range(generations):
+        # get the "best" teams and send them to the subsequent generation
+        calls = None if trace is None else collections.Counter(rank_order=1)
+        if trace is not None:
+            rank_start = time.perf_counter()
+        scores = np.array(scores)
+        order = rank_order(scores, bd, ranked, elites)
+        scores = scores[order]
+        if operators.batched:
+            teams = teams[order]
+            population = breeding.to_teams(teams[:ranked], data)
+        else:
+            population = [population[i] for i in order]
+            counts = [counts[i] for i in order]
+        if trace is not None:
+            rank_time = time.perf_counter() - rank_start
+        if hall_of_fame is not None:
+            hall_of_fame.update(population[:ranked], scores[:ranked])
+
+        # check for convergence
+        points = int(scores[0])
+        if best_points is None or (points < best_points if bd else points > best_points):
+            best_points, stalled = points, 0
+        else:
+            stalled += 1
+        if target_score is not None and (
+            points <= target_score if bd else points >= target_score
+        ):
+            stop_reason = STOP_TARGET
+            break
+        if stall_generations is not None and stalled >= stall_generations:
+            stop_reason = STOP_STALL
+            break
+        if deadline is not None and time.monotonic() >= deadline:
+            stop_reason = STOP_TIME
+            break
+        if min_diversity is not None or (
+            operators.adaptive and generation % ADAPT_INTERVAL == 0
+        ):
+            if operators.batched:
+                current_diversity = breeding.diversity(teams)
+            else:
+                current_diversity = diversity(population)
+            if min_diversity is not None and current_diversity < min_diversity:
+                stop_reason = STOP_DIVERSITY
+                break
+            if operators.adaptive and generation % ADAPT_INTERVAL == 0:
+                rates = operators.rates(current_diversity)
+        if cancel is not None and cancel.is_set():
+            stop_reason = STOP_CANCELLED
+            break
+        if progress is not None and generation % progress_interval == 0:
+            progress(generation, population[0], points)
+
+        # filter population for the subsequent generation and fill it up by cross-over'ing and mutating
+        # the current "best" teams
+        mean_points = float(scores.mean())
+        keep = min(elites, len(scores))
+        children = population_size - keep
+        times = None if trace is None else dict.fromkeys(TRACE_PHASES[1:], 0.0)
+        stats = None if trace is None else {"duplicates": 0, "unresolved": 0}
+        if operators.batched:
+            if times is not None:
+                start = time.perf_counter()
+            parents = np.array(operators.select(scores, keep, children, bd)).reshape(-1, 2)
+            if times is not None:
+                times["selection_time"] += time.perf_counter() - start
+            rng = np.random.default_rng(random.getrandbits(64))  # seeded from random for reproducible searches
+            teams, scores = breeding.breed(
+                teams,
+                scores,
+                parents,
+                keep,
+                bonus_traits,
+                rates,
+                eligible,
+                included,
+                rng,
+                times,
+                operators.dedup,
+                stats,
+                calls,
+                data,
+            )
+        else:
+            population, counts, scores = _breed(
+                population,
+                counts,
+                scores.tolist(),
+                population_size,
+                elites,
+                bonus_traits,
+                included_units,
+                bd,
+                pool,
+                operators,
+                rates,
+                times,
+                stats,
+                calls,
+                cache,
+            )
+        if trace is None:
+            continue
+        trace.record(
+            {
+                "generation": generation,
+                "rank_time": rank_time,
+                **times,
+                "best": points,
+                "mean": mean_points,
+                "diversity": (
+                    breeding.diversity(teams[:keep])
+                    if operators.batched
+                    else diversity(population[:keep])
+                ),
+                "children": children,
+                **stats,
+                "duplicate_rate": stats["duplicates"] / children if children else 0.0,
+                "mutation_rate": rates[0],
+                "crossover_rate": rates[1],
+                "calls": dict(calls),
             }
-        # randomly replace a unit
-        team[random.randrange(len(team))] = random.choice(
-            list(other_units.values())
-        )  # randomly replace a unit with another one to encourage diversity
-
-    # add included units back
-    if included_units:
-        for name in included_units:
-            new_unit = all_units[name]
-            if new_unit not in team:
-                team.append(new_unit)
+        )
+    else:
+        generation = generations
+    if operators.batched:
+        population = breeding.to_teams(teams, data)
+    return population, stop_reason, generation
 
-    return team
 
+def _breed(
+    population: list[list[Unit]],
+    counts: list[list[int]],
+    scores: list[int],
+    population_size: int,
+    elites: int,
+    bonus_traits: dict[str, int],
+    included_units: list[str],
+    bd: bool,
+    pool: CandidatePool,
+    operators: Operators,
+    rates: tuple[float, float],
+    times: dict[str, float] = None,
+    stats: dict[str, int] = None,
+    calls: collections.Counter = None,
+    cache: FitnessCache = None,
+) -> tuple[list[list[Unit]], list[list[int]], list[int]]:
+    """
+    Returns the next generation of a population ranked at its head: the elites followed by children of the parents
+    picked by operators.select, crossed over and mutated at the given (mutation, crossover) rates
+    counts and scores are kept parallel to population. A child is scored from its first parent by applying the
+    trait deltas of the units it swapped, instead of recounting the whole team
+    Children identical to a team of the generation are handled as operators.dedup, compared by team_mask
+    times - optional dict accumulating the seconds spent per phase (for SearchTrace)
+    stats - optional dict accumulating duplicate children, see breeding.breed
+    calls - optional Counter of the crossover, mutate and apply_delta calls made (for SearchTrace)
+    cache - optional FitnessCache, a child found in it takes its cached counts and points instead of a delta
+    """
+    mutation_rate, crossover_rate = rates
+
+    def cross(i: int, j: int) -> list[Unit]:
+        if random.random() >= crossover_rate:
+            return population[i].copy()
+        if calls is not None:
+            calls["crossover"] += 1
+        return operators.crossover(population[i], population[j])
 
-def find_team(
+    def mutate_child(team: list[Unit], rate: float) -> list[Unit]:
+        if calls is not None:
+            calls["mutate"] += 1
+        return operators.mutate(team, included_units, bd, pool, rate, bonus_traits)
+
+    elites = min(elites, len(population))  # the initial population may be smaller than population_size
+    if times is not None:
+        start = time.perf_counter()
+    parents = operators.select(np.array(scores), elites, population_size - elites, bd)
+    if times is not None:
+        times["selection_time"] += time.perf_counter() - start
+    new_population, new_counts, new_scores = (
+        population[:elites],
+        counts[:elites],
+        scores[:elites],
+    )
+    dedup = operators.dedup is not None or stats is not None
+    seen = {team_mask(team) for team in new_population} if dedup else None
+    context = None if cache is None else FitnessCache.context(bonus_traits, bd, pool.data)
+    for i, j in parents:
+        if times is not None:
+            start = time.perf_counter()
+        new_team = cross(i, j)
+        if times is not None:
+            crossed = time.perf_counter()
+        new_team = mutate_child(new_team, mutation_rate)
+        if dedup:
+            # duplicates are handled before scoring (timed with mutate)
+            mask = team_mask(new_team)
+            if mask in seen:
+                if stats is not None:
+                    stats["duplicates"] += 1
+                for _ in range(breeding.DEDUP_ATTEMPTS if operators.dedup is not None else 0):
+                    if operators.dedup == breeding.DEDUP_REJECT:
+                        # pair the first parent of a random pair with the second parent of another
+                        i, j = random.choice(parents)[0], random.choice(parents)[1]
+                        new_team = mutate_child(cross(i, j), mutation_rate)
+                    else:
+                        new_team = mutate_child(new_team, 1.0)
+                    mask = team_mask(new_team)
+                    if mask not in seen:
+                        break
+                else:
+                    if stats is not None:
+                        stats["unresolved"] += 1
+            seen.add(mask)
+        if times is not None:
+            mutated = time.perf_counter()
+        cached = None
+        if cache is not None:
+            key = (mask if dedup else team_mask(new_team), context)
+            cached = cache.get(key)
+        if cached is not None:
+            team_counts, team_points = cached
+        else:
+            team1 = population[i]
+            parent, child = set(team1), set(new_team)
+            team_counts, team_points = apply_delta(
+                counts[i],
+                scores[i],
+                [unit for unit in team1 if unit not in child],
+                [unit for unit in new_team if unit not in parent],
+                pool.data,
+            )
+            if calls is not None:
+                calls["apply_delta"] += 1
+            if cache is not None:
+                cache.put(key, team_counts, team_points)
+        new_population.append(new_team)
+        new_counts.append(team_counts)
+        new_scores.append(team_points)
+        if times is not None:
+            times["crossover_time"] += crossed - start
+            times["mutate_time"] += mutated - crossed
+            times["delta_time"] += time.perf_counter() - mutated
+    return new_population, new_counts, new_scores
+
+
+def run_search(
     generations: int = 1000,
     population_size: int = 500,
     bonus_traits: dict[str, int] = None,
     included_units: list[str] = None,
     bd: bool = False,
     team_size: int = 10,
-) -> tuple[list[Unit], int]:
+    stall_generations: int = None,
+    target_score: int = None,
+    time_budget: float = None,
+    min_diversity: float = None,
+    top_k: int = 1,
+    min_distance: int = 2,
+    progress: Callable[[int, list[Unit], int], None] = None,
+    progress_interval: int = 10,
+    cancel: threading.Event = None,
+    trace: SearchTrace = None,
+    operators: Operators = BATCHED,
+    synergy_share: float = SYNERGY_SHARE,
+    seed_teams: list[list[Unit]] = None,
+    cache: FitnessCache = None,
+    verbose: bool = True,
+    data: GameData = GAME_DATA,
+) -> SearchResult:
     """
     Generates the "best" team comp using genetic algorithm and scoring based on number of trait breakpoints
+    time_budget - wall-clock budget in seconds. See evolve for the other convergence criteria
+    top_k - number of distinct teams kept in SearchResult.teams, at least min_distance apart (see HallOfFame)
+    progress, progress_interval, cancel - progress reporting and cancellation, see evolve
+    trace - optional SearchTrace for per-generation profiling
+    operators - selection, crossover and mutation of the genetic algorithm, see Operators
+    synergy_share, seed_teams - warm start of the initial population, see seed_population
+    cache - optional FitnessCache shared between searches. Otherwise the list path uses a new one for this search
+    data - data pack to plan for (see gamedata.load_pack), unit names and bonus traits are looked up in it
+    Returns None if no team can be generated
     """
-    print("\n Generating... \n")
+    if verbose:
+        print("\n Generating... \n")
     start_time = time.time()
-    # generate random teams
+    if cache is None and not operators.batched:
+        cache = FitnessCache()
+    pool = CandidatePool(included_units, bd, data)
+    hall_of_fame = HallOfFame(top_k, min_distance, bd)
+    # generate the initial teams
     try:
-        population = [
-            generate_random_team(included_units, bd, team_size)
-            for _ in range(generations)
-        ]
+        population = seed_population(
+            population_size,
+            included_units,
+            bd,
+            team_size,
+            pool,
+            bonus_traits,
+            synergy_share,
+            seed_teams,
+        )
     except ValueError as e:
         print(f"Error occured during team generation: {e}")
         return
-    for _ in range(generations):
-        # get the "best" teams and send them to the subsequent generation
-        # if Build Different, we want the least number of traits (and exlude unique traits)
-        population.sort(
-            key=lambda team: calculate_points(team, bonus_traits), reverse=not bd
-        )
-        population = population[
-            : population_size // SELECTION_FACTOR
-        ]  # filter population for the subsequent generation
-        # fill up the new population by cross-over'ing and mutating the current "best" teams
-        while len(population) < population_size:
-            team1, team2 = random.sample(population, 2)
-            new_team = crossover(team1, team2)
-            population.append(mutate(new_team, included_units, bd))
+    population, stop_reason, generation = evolve(
+        population,
+        generations,
+        population_size,
+        bonus_traits,
+        included_units,
+        bd,
+        stall_generations,
+        target_score,
+        None if time_budget is None else time.monotonic() + time_budget,
+        min_diversity,
+        pool,
+        hall_of_fame,
+        progress,
+        progress_interval,
+        cancel,
+        trace,
+        operators,
+        cache,
+    )
 
     # return best team sorted by points
     best_team = sorted(population[0], key=lambda unit: unit.cost)
-    best_points = calculate_points(best_team, bonus_traits)
+    best_points = calculate_points(best_team, bonus_traits, data)
     end_time = time.time()
 
-    print(
-        f"Best team: {[unit.name for unit in sorted(best_team, key=lambda unit : unit.cost)]}, points: {best_points}"
+    if verbose:
+        print(
+            f"Best team: {[unit.name for unit in sorted(best_team, key=lambda unit : unit.cost)]}, points: {best_points}"
+        )
+        print(f"Stopped at generation {generation}: {stop_reason}")
+        if cache is not None and not operators.batched:
+            print(
+                f"Fitness cache: {cache.hits} hits, {cache.misses} misses ({cache.hit_rate():.0%} hit rate)"
+            )
+        print(f"\n Runtime: {end_time - start_time} seconds\n")
+
+    return SearchResult(
+        best_team,
+        best_points,
+        generation,
+        stop_reason,
+        end_time - start_time,
+        [
+            (sorted(team, key=lambda unit: unit.cost), points)
+            for team, points in hall_of_fame.teams()
+        ],
     )
+
+
+def find_team(*args, **kwargs) -> tuple[list[Unit], int]:
+    """
+    Generates the "best" team comp and returns (team, points)
+    Takes the same arguments as run_search, which also reports why and when the search stopped
+    """
+    result = run_search(*args, **kwargs)
+    if result is None:
+        return
+    return result.team, result.points
+
+
+def find_team_exact(
+    bonus_traits: dict[str, int] = None,
+    included_units: list[str] = None,
+    bd: bool = False,
+    team_size: int = 10,
+    data: GameData = GAME_DATA,
+) -> tuple[list[Unit], int]:
+    """
+    Same as find_team but returns the provably best team using the branch-and-bound solver
+    Practical for common team sizes (8-12 units), see solver.solve_exact for the top-k variant
+    """
+    print("\n Solving... \n")
+    start_time = time.time()
+    try:
+        [(best_team, best_points)] = solve_exact(
+            team_size, bonus_traits, included_units, bd, data=data
+        )
+    except ValueError as e:
+        print(f"Error occured during team generation: {e}")
+        return
+    best_team = sorted(best_team, key=lambda unit: unit.cost)
+    end_time = time.time()
+
+    print(f"Best team: {[unit.name for unit in best_team]}, points: {best_points}")
     print(f"\n Runtime: {end_time - start_time} seconds\n")
 
     return best_team, best_points
 
 
+def _run_island(
+    population: list[list[str]],
+    rng_state: tuple,
+    generations: int,
+    population_size: int,
+    bonus_traits: dict[str, int],
+    included_units: list[str],
+    bd: bool,
+    team_size: int,
+    pack: str,
+) -> tuple[list[list[str]], tuple]:
+    """
+    Worker for find_team_islands: evolves one island and returns its ranked population and random state
+    Teams cross process boundaries as unit names since Unit objects are compared by identity, and the data pack as
+    its name (see gamedata.load_pack)
+    rng_state is either a seed (first epoch) or the state returned by the previous epoch
+    """
+    if isinstance(rng_state, int):
+        random.seed(rng_state)
+    else:
+        random.setstate(rng_state)
+    data = load_pack(pack)
+    pool = CandidatePool(included_units, bd, data)
+    if population:
+        population = [[pack_units(data)[name] for name in team] for team in population]
+    else:
+        population = seed_population(
+            population_size, included_units, bd, team_size, pool, bonus_traits
+        )
+    population, _, _ = evolve(
+        population,
+        generations,
+        population_size,
+        bonus_traits,
+        included_units,
+        bd,
+        pool=pool,
+    )
+    population, _ = rank_population(population, bonus_traits, bd, data)
+    return [[unit.name for unit in team] for team in population], random.getstate()
+
+
+def find_team_islands(
+    islands: int = None,
+    generations: int = 1000,
+    population_size: int = 500,
+    bonus_traits: dict[str, int] = None,
+    included_units: list[str] = None,
+    bd: bool = False,
+    team_size: int = 10,
+    migration_interval: int = 50,
+    migration_size: int = 5,
+    seed: int = None,
+    data: GameData = GAME_DATA,
+) -> tuple[list[Unit], int]:
+    """
+    Island model: evolves independent populations in a process pool and returns the global best team
+    islands - number of populations (and worker processes), defaults to the number of cores
+    migration_interval - every this many generations, the top migration_size teams of each island replace the worst
+    teams of the next island (ring topology)
+    seed - island i is seeded with seed + i so runs are reproducible
+    data - data pack to plan for, loaded again by name in the worker processes
+    """
+    print("\n Generating... \n")
+    start_time = time.time()
+    islands = islands or os.cpu_count() or 1
+    if seed is None:
+        seed = random.randrange(2**32)
+    populations = [[] for _ in range(islands)]
+    rng_states = [seed + i for i in range(islands)]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=islands) as pool:
+        remaining = generations
+        while remaining > 0:
+            epoch = min(migration_interval, remaining)
+            remaining -= epoch
+            futures = [
+                pool.submit(
+                    _run_island,
+                    populations[i],
+                    rng_states[i],
+                    epoch,
+                    population_size,
+                    bonus_traits,
+                    included_units,
+                    bd,
+                    team_size,
+                    data.name,
+                )
+                for i in range(islands)
+            ]
+            try:
+                results = [future.result() for future in futures]
+            except ValueError as e:
+                print(f"Error occured during team generation: {e}")
+                return
+            populations = [population for population, _ in results]
+            rng_states = [state for _, state in results]
+            # migrate the best teams of each island to the next one
+            if remaining > 0 and islands > 1 and migration_size > 0:
+                migrants = [population[:migration_size] for population in populations]
+                populations = [
+                    populations[i][: len(populations[i]) - migration_size]
+                    + [team.copy() for team in migrants[i - 1]]
+                    for i in range(islands)
+                ]
+
+    # islands are returned ranked, so the global best is among their first teams
+    best_teams = [
+        [pack_units(data)[name] for name in population[0]] for population in populations
+    ]
+    best_points = [calculate_points(team, bonus_traits, data) for team in best_teams]
+    pick = min if bd else max
+    best_index = pick(range(islands), key=lambda i: best_points[i])
+    best_team = sorted(best_teams[best_index], key=lambda unit: unit.cost)
+    end_time = time.time()
+
+    print(
+        f"Best team: {[unit.name for unit in best_team]}, points: {best_points[best_index]} (island {best_index} of {islands}, seed {seed})"
+    )
+    print(f"\n Runtime: {end_time - start_time} seconds\n")
+
+    return best_team, best_points[best_index]
+
+
 # for testing
 if __name__ == "__main__":
     # find_team()
@@ -0,0 +1,83 @@
+"""
+  Comp atlas: files written by write_atlas and read back by Atlas.lookup
+"""
+
+import json
+import random
+
+import pytest
+
+import atlas
+from atlas import STOP_ATLAS, Atlas, atlas_cores, build_specs, open_atlas, write_atlas
+from batch import run_spec
+from database import all_units, unique_traits
+
+
+def search(spec: dict) -> dict:
+    return run_spec(dict(spec, generations=3, population_size=30, top_k=3))
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    random.seed(1)
+    specs = [
+        {"id": 0, "core": [], "team_size": 8, "bd": False},
+        {"id": 1, "core": ["Ahri"], "team_size": 8, "bd": False},
+        {"id": 2, "core": ["Ahri"], "team_size": 8, "bd": True},
+        {"id": 3, "core": ["Jinx", "Ahri"], "team_size": 9, "bd": False},
+        {"id": 4, "core": ["Nunu"], "team_size": 8, "bd": False},
+    ]
+    results = [search(spec) for spec in specs[:4]] + [{"id": 4, "error": "RuntimeError: failed"}]
+    path = str(tmp_path_factory.mktemp("atlas") / "atlas.bin")
+    write_atlas(path, specs, results)
+    return Atlas(path), specs, results
+
+
+def test_lookup_returns_the_stored_comps(built):
+    comps, specs, results = built
+    assert len(comps) == 4  # the failed search is skipped
+    for spec, result in zip(specs[:4], results):
+        found = comps.lookup(None, spec["core"], spec["bd"], spec["team_size"], top_k=3)
+        assert found.stop_reason == STOP_ATLAS
+        assert [([unit.name for unit in team], points) for team, points in found.teams] == [
+            (team["team"], team["points"]) for team in result["teams"]
+        ]
+        assert found.generation == result["generation"]
+        assert found.runtime == pytest.approx(result["runtime"])
+    assert len(comps.lookup(None, ["Ahri", "Jinx", "Ahri"], False, 9, top_k=1).teams) == 1
+
+
+def test_lookup_misses_fall_back_to_search(built):
+    comps, _, _ = built
+    assert comps.lookup(None, ["Nunu"], False, 8) is None  # failed when built
+    assert comps.lookup(None, ["Ahri"], False, 9) is None
+    assert comps.lookup({"Frost": 1}, ["Ahri"], False, 8) is None
+    assert comps.lookup({"Not a trait": 1}, ["Ahri"], False, 8) is not None  # not scored, like the scorers
+    assert comps.lookup(None, ["Not a unit"], False, 8) is None
+    assert comps.lookup(None, ["Jinx"], False, 8) is None
+
+
+def test_atlas_of_another_pack_is_not_used(tmp_path):
+    path = str(tmp_path / "atlas.bin")
+    write_atlas(path, [], [])
+    assert len(Atlas(path)) == 0
+    data = open(path, "rb").read()
+    length = int.from_bytes(data[len(atlas.MAGIC) : len(atlas.MAGIC) + 4], "little")
+    start = len(atlas.MAGIC) + 4
+    header = json.loads(data[start : start + length])
+    header["data"] = ["another", "0"]
+    encoded = json.dumps(header).encode()
+    with open(path, "wb") as file:
+        file.write(atlas.MAGIC + len(encoded).to_bytes(4, "little") + encoded + data[start + length :])
+    with pytest.raises(ValueError):
+        Atlas(path)
+    assert open_atlas(path) is None
+    assert open_atlas(str(tmp_path / "missing.bin")) is None
+
+
+def test_built_different_specs_skip_unique_traits():
+    specs = build_specs(sizes=(8,), max_core=1)
+    assert len(atlas_cores(1)) == len(all_units) + 1
+    for spec in specs:
+        if spec["bd"]:
+            assert not any(trait in unique_traits for name in spec["core"] for trait in all_units[name].traits)
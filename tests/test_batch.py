@@ -0,0 +1,46 @@
+"""
+  Batch: parsing spec files and running specs
+"""
+
+import json
+import random
+
+from batch import read_specs, run_spec
+
+
+def test_read_specs_reports_malformed_lines():
+    lines = [
+        '{"id": "honey", "core": ["Nunu"], "team_size": 9}\n',
+        "\n",
+        '{"core": ["Ahri"]}\r\n',
+        "{not json\n",
+        "[1, 2]\n",
+        "   \n",
+        '{"team_size": 8}',
+    ]
+    specs, errors = read_specs(lines)
+    assert specs == [
+        {"id": "honey", "core": ["Nunu"], "team_size": 9},
+        {"core": ["Ahri"], "id": 3},
+        {"team_size": 8, "id": 7},
+    ]
+    assert [error["id"] for error in errors] == [4, 5]
+    assert errors[0]["error"].startswith("JSONDecodeError")
+    assert errors[1]["error"] == "ValueError: a search spec must be a JSON object"
+
+
+def test_specs_round_trip_through_a_file(tmp_path):
+    path = tmp_path / "specs.jsonl"
+    written = [{"id": i, "core": ["Ahri"], "team_size": 8 + i, "bonus_traits": {"Frost": 1}} for i in range(3)]
+    path.write_text("".join(json.dumps(spec) + "\n" for spec in written))
+    with open(path) as file:
+        specs, errors = read_specs(file)
+    assert specs == written and errors == []
+
+
+def test_run_spec_result_is_json():
+    random.seed(1)
+    result = run_spec({"id": "a", "core": ["Ahri"], "team_size": 8, "generations": 3, "top_k": 2})
+    assert json.loads(json.dumps(result)) == result
+    assert result["id"] == "a" and len(result["team"]) == 8 and "Ahri" in result["team"]
+    assert result["teams"][0] == {"team": result["team"], "points": result["points"]}
@@ -0,0 +1,179 @@
+"""
+  Batched breeding: the array operators and the populations evolve breeds with them
+"""
+
+import dataclasses
+import random
+
+import numpy as np
+import pytest
+
+import breeding
+from database import all_units, unique_traits
+from scoring import encode_population, score_population, team_mask, trait_counts
+from teambuilder import (
+    BATCHED,
+    GUIDED,
+    TOURNAMENT,
+    TRUNCATION,
+    CandidatePool,
+    _breed,
+    calculate_points,
+    evolve,
+    seed_population,
+)
+
+"""
+    Global Variables
+"""
+PRESETS = {"truncation": TRUNCATION, "guided": GUIDED, "tournament": TOURNAMENT, "batched": BATCHED}
+SEARCHES = {
+    "plain": (None, [], False, 8),
+    "core": ({"Frost": 1}, ["Ahri", "Jinx"], False, 9),
+    "bd": (None, ["Ahri", "Wukong"], True, 7),  # Wukong has a unique trait, Built Different leaves it out
+}
+
+
+def population(included_units: list[str], bd: bool, team_size: int, size: int = 60) -> np.ndarray:
+    return breeding.to_array(seed_population(size, included_units, bd, team_size, synergy_share=0.0))
+
+
+@pytest.fixture(autouse=True)
+def seed():
+    random.seed(1)
+
+
+def test_crossover_keeps_shared_units_and_team_size():
+    rng = np.random.default_rng(1)
+    teams = population([], False, 8)
+    members = breeding.one_hot(teams)
+    first, second = members[::2], members[1::2]
+    children = breeding.crossover(rng, first, second, 1.0)
+    assert (children.sum(axis=1) == 8).all()
+    assert not (first & second & ~children).any()  # shared units are kept
+    assert not (children & ~(first | second)).any()  # other units come from a parent
+    assert (breeding.crossover(rng, first, second, 0.0) == first).all()
+
+
+def test_mutate_swaps_one_eligible_unit_and_keeps_included_units():
+    rng = np.random.default_rng(2)
+    pool = CandidatePool(["Ahri"], True)
+    members = breeding.one_hot(population(["Ahri"], True, 8))
+    eligible, included = breeding.unit_mask(pool.others), breeding.unit_mask(pool.included)
+    children = members.copy()
+    breeding.mutate(rng, children, 1.0, eligible, included)
+    assert (children.sum(axis=1) == 8).all()
+    assert children[:, included].all()
+    assert ((children != members).sum(axis=1) == 2).all()  # one unit out, one unit in
+    assert not (children & ~members & ~eligible).any()
+
+
+@pytest.mark.parametrize("dedup", [None, breeding.DEDUP_REJECT, breeding.DEDUP_MUTATE])
+def test_breed_returns_scored_teams(dedup):
+    rng = np.random.default_rng(3)
+    pool = CandidatePool(["Ahri"], False)
+    teams = population(["Ahri"], False, 9)
+    scores = score_population(teams, {"Frost": 1})
+    parents = rng.integers(len(teams), size=(50, 2))
+    new_teams, new_scores = breeding.breed(
+        teams,
+        scores,
+        parents,
+        10,
+        {"Frost": 1},
+        (0.5, 0.9),
+        breeding.unit_mask(pool.others),
+        breeding.unit_mask(pool.included),
+        rng,
+        dedup=dedup,
+    )
+    assert new_teams.shape == (60, 9)
+    assert (new_teams[:10] == teams[:10]).all() and (new_scores[:10] == scores[:10]).all()
+    assert (np.diff(new_teams, axis=1) > 0).all()  # sorted, distinct unit ids
+    assert new_scores.tolist() == [calculate_points(team, {"Frost": 1}) for team in breeding.to_teams(new_teams)]
+
+
+@pytest.mark.parametrize("operators", PRESETS.values(), ids=PRESETS)
+@pytest.mark.parametrize("search", SEARCHES.values(), ids=SEARCHES)
+def test_evolved_population_is_valid(operators, search):
+    bonus_traits, included_units, bd, team_size = search
+    pool = CandidatePool(included_units, bd)
+    initial = seed_population(60, included_units, bd, team_size, pool, bonus_traits)
+    final, _, _ = evolve(initial, 15, 60, bonus_traits, included_units, bd, pool=pool, operators=operators)
+    assert len(final) == 60
+    for team in final:
+        names = {unit.name for unit in team}
+        assert len(names) == len(team) == team_size
+        assert {unit.name for unit in pool.core} <= names
+        assert not (bd and any(trait in unique_traits for name in names for trait in all_units[name].traits))
+    teams = breeding.to_array(final)
+    assert score_population(teams, bonus_traits).tolist() == [calculate_points(team, bonus_traits) for team in final]
+
+
+@pytest.mark.parametrize("offset", [0, 64])  # unit ids of 64 and up no longer fit an int64 bitmask
+def test_duplicates_finds_repeated_teams(offset):
+    teams = population([], False, 8, 20) + offset
+    teams = np.concatenate([teams, teams[[3, 7, 3]], teams[[0]]])
+    reference = []
+    seen = set()
+    for i, row in enumerate(teams.tolist()):
+        if tuple(row) in seen and i >= 10:
+            reference.append(i)
+        seen.add(tuple(row))
+    assert breeding.duplicates(teams, 10).tolist() == reference == [20, 21, 22, 23]
+
+
+@pytest.mark.parametrize("dedup", [None, breeding.DEDUP_REJECT, breeding.DEDUP_MUTATE])
+def test_breed_counts_duplicates_it_leaves(dedup):
+    rng = np.random.default_rng(4)
+    pool = CandidatePool([], False)
+    teams = np.repeat(population([], False, 8, 4), 15, axis=0)  # 4 teams, so most children repeat one
+    scores = score_population(teams, None)
+    stats = {"duplicates": 0, "unresolved": 0}
+    new_teams, _ = breeding.breed(
+        teams,
+        scores,
+        rng.integers(len(teams), size=(50, 2)),
+        10,
+        None,
+        (0.2, 0.9),
+        breeding.unit_mask(pool.others),
+        breeding.unit_mask(pool.included),
+        rng,
+        dedup=dedup,
+        stats=stats,
+    )
+    left = len(breeding.duplicates(new_teams, 10))
+    assert stats["duplicates"] > 0
+    assert left == stats["unresolved"]
+    assert left == stats["duplicates"] if dedup is None else left < stats["duplicates"]
+    assert (np.diff(new_teams, axis=1) > 0).all()
+
+
+@pytest.mark.parametrize("dedup", [None, breeding.DEDUP_REJECT, breeding.DEDUP_MUTATE])
+def test_list_breeding_counts_duplicates_it_leaves(dedup):
+    operators = dataclasses.replace(TRUNCATION, dedup=dedup)
+    pool = CandidatePool(["Ahri"], False)
+    teams = seed_population(4, ["Ahri"], False, 8, pool, synergy_share=0.0) * 15
+    encoded = encode_population(teams)
+    stats = {"duplicates": 0, "unresolved": 0}
+    new_teams, counts, scores = _breed(
+        teams,
+        trait_counts(encoded, None).tolist(),
+        score_population(encoded, None).tolist(),
+        60,
+        10,
+        None,
+        ["Ahri"],
+        False,
+        pool,
+        operators,
+        (0.2, 0.9),
+        stats=stats,
+    )
+    masks = [team_mask(team) for team in new_teams]
+    left = sum(mask in masks[:i] for i, mask in enumerate(masks) if i >= 10)
+    assert stats["duplicates"] > 0
+    assert left == stats["unresolved"]
+    assert left == stats["duplicates"] if dedup is None else left < stats["duplicates"]
+    assert scores == [calculate_points(team, None) for team in new_teams]
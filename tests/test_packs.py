@@ -0,0 +1,114 @@
+"""
+  Several data packs searched in one process: a second pack derived from set12 with other unit ids and breakpoints
+"""
+
+import json
+import random
+import shutil
+
+import pytest
+
+import gamedata
+from batch import run_spec
+from database import all_units, pack_units
+from gamedata import GAME_DATA, load_pack
+from resultstore import spec_key
+from server import validate_spec
+from solver import solve_exact
+from teambuilder import BATCHED, GUIDED, TRUNCATION, calculate_points, run_search
+
+"""
+    Global Variables
+"""
+PRESETS = {"truncation": TRUNCATION, "guided": GUIDED, "batched": BATCHED}
+DROPPED = "Jayce"  # not in the second pack
+
+
+def derive_pack(pack: dict) -> dict:
+    """
+    Returns set12 with the units in reverse order (so every id differs), one unit less and halved breakpoints
+    """
+    pack = json.loads(json.dumps(pack))
+    pack.update(name="mini", version="1.0", title="Mini")
+    pack["units"] = {name: cost for name, cost in reversed(pack["units"].items()) if name != DROPPED}
+    for trait in pack["traits"].values():
+        trait["units"] = [name for name in trait["units"] if name != DROPPED]
+        trait["breakpoints"] = sorted({max(1, bp // 2) for bp in trait["breakpoints"]})
+    pack["unique_traits"] = {trait: name for trait, name in pack["unique_traits"].items() if name != DROPPED}
+    return pack
+
+
+def reference_points(pack: dict, names: list[str], bonus_traits: dict[str, int]) -> int:
+    """
+    Scores a team straight from the pack file, as calculate_points does for the active pack
+    """
+    counts = {trait: sum(name in spec["units"] for name in names) for trait, spec in pack["traits"].items()}
+    for trait in bonus_traits or {}:
+        if trait in counts:
+            counts[trait] += 1
+    return sum(count >= bp for trait, count in counts.items() for bp in pack["traits"][trait]["breakpoints"])
+
+
+@pytest.fixture(scope="module")
+def packs(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("packs")
+    shutil.copy(gamedata.pack_path(GAME_DATA.name), directory)
+    with open(gamedata.pack_path(GAME_DATA.name)) as file:
+        pack = json.load(file)
+    mini = derive_pack(pack)
+    (directory / "mini.json").write_text(json.dumps(mini))
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(gamedata, "PACKS_DIR", str(directory))
+        yield {GAME_DATA.name: (GAME_DATA, pack), "mini": (load_pack("mini"), mini)}
+
+
+@pytest.mark.parametrize("operators", PRESETS.values(), ids=PRESETS)
+def test_searches_of_both_packs_use_their_own_units_and_breakpoints(packs, operators):
+    random.seed(1)
+    for data, pack in packs.values():
+        bonus_traits = {"Frost": 1}
+        result = run_search(
+            60, 80, bonus_traits, ["Ahri"], team_size=9, top_k=3, operators=operators, verbose=False, data=data
+        )
+        units = pack_units(data)
+        for team, points in result.teams:
+            assert all(units[unit.name] is unit for unit in team)
+            assert points == calculate_points(team, bonus_traits, data)
+            assert points == reference_points(pack, [unit.name for unit in team], bonus_traits)
+    mini, _ = packs["mini"]
+    assert DROPPED not in pack_units(mini)
+    assert pack_units(mini)["Ahri"].id != all_units["Ahri"].id
+
+
+def test_solver_plans_for_the_given_pack(packs):
+    mini, pack = packs["mini"]
+    [(team, points)] = solve_exact(8, None, ["Ahri"], data=mini)
+    assert points == reference_points(pack, [unit.name for unit in team], None)
+    assert points > solve_exact(8, None, ["Ahri"])[0][1]  # lower breakpoints are easier to reach
+
+
+def test_run_spec_plans_for_the_spec_pack(packs):
+    mini, pack = packs["mini"]
+    random.seed(2)
+    result = run_spec({"id": "mini", "pack": "mini", "core": ["Ahri"], "team_size": 8, "generations": 5})
+    assert result["points"] == reference_points(pack, result["team"], None)
+    assert run_spec({"core": [DROPPED], "team_size": 8, "generations": 5})["team"]
+    with pytest.raises(KeyError):
+        run_spec({"pack": "mini", "core": [DROPPED], "team_size": 8, "generations": 5})
+    with pytest.raises(ValueError):
+        run_spec({"pack": "../mini"})
+    assert spec_key(None, ["Ahri"], data=mini) != spec_key(None, ["Ahri"])
+
+
+def test_server_validates_specs_against_their_pack(packs):
+    mini, _ = packs["mini"]
+    validate_spec({"core": [DROPPED], "team_size": len(all_units)})
+    validate_spec({"pack": "mini", "core": ["Ahri"], "team_size": len(pack_units(mini))})
+    for spec in (
+        {"pack": "mini", "core": [DROPPED]},
+        {"pack": "mini", "team_size": len(all_units)},
+        {"pack": "unknown"},
+        {"pack": 12},
+    ):
+        with pytest.raises(ValueError):
+            validate_spec(spec)
@@ -0,0 +1,81 @@
+"""
+  Result store: recording, merging and looking up stored comps
+"""
+
+import random
+
+from database import all_units
+from resultstore import STOP_CACHED, ResultStore, cached_search, open_store, spec_key
+from teambuilder import SearchResult, calculate_points
+
+"""
+    Global Variables
+"""
+UNITS = list(all_units.values())
+
+
+def result(teams: list[list], generation: int = 10, runtime: float = 1.0) -> SearchResult:
+    scored = sorted(((team, calculate_points(team, None)) for team in teams), key=lambda item: -item[1])
+    return SearchResult(scored[0][0], scored[0][1], generation, "generations", runtime, scored)
+
+
+def names(teams: list[tuple[list, int]]) -> list[tuple[set, int]]:
+    return [({unit.name for unit in team}, points) for team, points in teams]
+
+
+def test_record_and_lookup_round_trip(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite3"))
+    rng = random.Random(1)
+    first = result([rng.sample(UNITS, 8) for _ in range(3)])
+    assert store.lookup(None, ["Ahri"], False, 8) is None
+    recorded = store.record(first, None, ["Ahri"], False, 8)
+    cached = store.lookup(None, ["Ahri"], False, 8)
+    assert cached.stop_reason == STOP_CACHED
+    assert names(cached.teams) == names(recorded.teams) == names(first.teams)
+    assert (cached.generation, cached.runtime) == (10, 1.0)
+    assert len(store) == 1
+
+
+def test_record_merges_the_best_distinct_comps(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite3"))
+    rng = random.Random(2)
+    teams = [rng.sample(UNITS, 8) for _ in range(6)]
+    store.record(result(teams[:3]), {"Frost": 1}, ["Ahri", "Jinx"], False, 8)
+    merged = store.record(result(teams[2:5] + [teams[0]], 5, 0.5), {"Frost": 1}, ["Jinx", "Ahri"], False, 8)
+    expected = sorted((calculate_points(team, None) for team in teams[:5]), reverse=True)[:4]
+    assert [points for _, points in merged.teams] == expected
+    assert len({frozenset(team) for team, _ in names(merged.teams)}) == len(merged.teams)
+    assert (merged.generation, merged.runtime) == (15, 1.5)
+    assert names(store.lookup({"Frost": 1}, ["Jinx", "Ahri"], False, 8).teams) == names(merged.teams)
+
+
+def test_spec_key_ignores_order_and_repeats():
+    assert spec_key({"Frost": 1, "Arcana": 1}, ["Jinx", "Ahri"]) == spec_key(
+        {"Arcana": 1, "Frost": 1}, ["Ahri", "Jinx", "Ahri"]
+    )
+    assert spec_key(None, ["Ahri"], True) != spec_key(None, ["Ahri"], False)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite3"), max_entries=2)
+    team = UNITS[:8]
+    for size in (8, 9, 10):
+        store.record(result([team]), None, None, False, size)
+    assert len(store) == 2
+    assert store.lookup(None, None, False, 8) is None
+
+
+def test_cached_search_returns_stored_comps(tmp_path):
+    store = ResultStore(str(tmp_path / "results.sqlite3"))
+    random.seed(3)
+    searched = cached_search(store, generations=5, population_size=40, team_size=8, top_k=3, verbose=False)
+    cached = cached_search(store, generations=5, population_size=40, team_size=8, top_k=3, verbose=False)
+    assert cached.stop_reason == STOP_CACHED
+    assert names(cached.teams) == names(searched.teams)
+
+
+def test_open_store_without_a_usable_database(tmp_path):
+    path = tmp_path / "results.sqlite3"
+    path.write_bytes(b"not a database" * 100)
+    assert open_store(str(path)) is None
+    assert open_store(str(tmp_path / "file" / "results.sqlite3")) is not None
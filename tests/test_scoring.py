@@ -0,0 +1,99 @@
+"""
+  Scoring equivalence: the vectorized and incremental scorers against the original per-team loop
+"""
+
+import collections
+import random
+
+import pytest
+
+from database import all_units, traits_breakpoints_units, unique_traits, Unit
+from scoring import FitnessCache, apply_delta, encode_population, score_population, team_mask, trait_counts
+from teambuilder import calculate_points
+
+"""
+    Global Variables
+"""
+UNITS = list(all_units.values())
+BONUS_TRAITS = [
+    None,
+    {},
+    {"Frost": 1},
+    {"Frost": 2, "Arcana": 1, "Portal": 1},
+    {"Druid": 1},  # unique traits are not scored
+    {"Dragon": 1, "Ravenous": 1, "Not a trait": 1},
+]
+
+
+def baseline_points(team: list[Unit], bonus_traits: dict[str, int]) -> int:
+    """
+    calculate_points as the planner first shipped it, the reference the scorers must match
+    """
+    trait_counter = collections.defaultdict(int)
+    for unit in team:
+        for trait in unit.traits:
+            if trait not in unique_traits:
+                trait_counter[trait] += 1
+    if bonus_traits:
+        for trait, count in bonus_traits.items():
+            if trait not in unique_traits:
+                trait_counter[trait] += 1
+    points = 0
+    for trait, count in trait_counter.items():
+        if trait in traits_breakpoints_units:
+            for bp in traits_breakpoints_units[trait][0]:
+                if count >= bp:
+                    points += 1
+                else:
+                    break
+    return points
+
+
+def random_teams(rng: random.Random, count: int) -> list[list[Unit]]:
+    return [rng.sample(UNITS, rng.randint(1, 11)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("bonus_traits", BONUS_TRAITS)
+def test_score_population_matches_baseline(bonus_traits):
+    teams = random_teams(random.Random(1), 2000)
+    expected = [baseline_points(team, bonus_traits) for team in teams]
+    assert score_population(encode_population(teams), bonus_traits).tolist() == expected
+
+
+@pytest.mark.parametrize("bonus_traits", BONUS_TRAITS)
+def test_calculate_points_matches_baseline(bonus_traits):
+    for team in random_teams(random.Random(2), 2000):
+        assert calculate_points(team, bonus_traits) == baseline_points(team, bonus_traits)
+
+
+@pytest.mark.parametrize("bonus_traits", BONUS_TRAITS)
+def test_apply_delta_matches_baseline(bonus_traits):
+    rng = random.Random(3)
+    for team in random_teams(rng, 500):
+        counts = trait_counts(encode_population([team]), bonus_traits)[0].tolist()
+        points = baseline_points(team, bonus_traits)
+        for _ in range(5):
+            removed = rng.sample(team, rng.randint(0, len(team)))
+            others = [unit for unit in UNITS if unit not in team]
+            added = rng.sample(others, rng.randint(0, min(len(removed) + 1, 11 - len(team) + len(removed))))
+            counts, points = apply_delta(counts, points, removed, added)
+            team = [unit for unit in team if unit not in removed] + added
+            assert points == baseline_points(team, bonus_traits)
+            assert counts == trait_counts(encode_population([team]), bonus_traits)[0].tolist()
+
+
+def test_fitness_cache_counts_lookups_and_evicts_least_recently_used():
+    cache = FitnessCache(maxsize=2)
+    context = FitnessCache.context({"Frost": 1, "Druid": 1}, False)
+    assert context == FitnessCache.context({"Frost": 2}, False) != FitnessCache.context({"Frost": 1}, True)
+    teams = random_teams(random.Random(4), 3)
+    keys = [(team_mask(team), context) for team in teams]
+    assert cache.get(keys[0]) is None
+    cache.put(keys[0], [0], 1)
+    cache.put(keys[1], [0], 2)
+    assert cache.get(keys[0]) == ([0], 1)  # keys[1] is now the least recently used
+    cache.put(keys[2], [0], 3)
+    assert cache.get(keys[1]) is None and len(cache) == 2
+    assert (cache.hits, cache.misses, cache.hit_rate()) == (1, 2, 1 / 3)
+    cache.clear()
+    assert (len(cache), cache.hits, cache.misses) == (0, 0, 0)
@@ -0,0 +1,69 @@
+"""
+  Exact solver: solve_exact top-k against brute-force enumeration of every team at small team sizes
+"""
+
+import itertools
+
+import pytest
+
+from database import all_units, unique_traits
+from gamedata import GAME_DATA
+from solver import solve_exact
+from teambuilder import calculate_points
+
+"""
+    Global Variables
+"""
+TOP_K = 5
+
+
+def trait_class(name: str) -> tuple[int, ...]:
+    """
+    Returns the scored traits of a unit, teams that only differ by units of the same class are symmetric
+    """
+    return tuple(sorted(t for t in GAME_DATA.unit_traits[all_units[name].id] if t < GAME_DATA.scored_traits))
+
+
+def brute_force(
+    team_size: int, bonus_traits: dict[str, int], included_units: list[str], bd: bool, top_k: int
+) -> list[int]:
+    """
+    Returns the points of the best top_k teams by enumerating every team, counting symmetric teams once
+    """
+    candidates = [
+        name
+        for name in all_units
+        if name not in included_units
+        and not (bd and any(trait in unique_traits for trait in all_units[name].traits))
+    ]
+    points = {}
+    for others in itertools.combinations(candidates, team_size - len(included_units)):
+        key = tuple(sorted(trait_class(name) for name in others))
+        if key not in points:
+            team = [all_units[name] for name in included_units + list(others)]
+            points[key] = calculate_points(team, bonus_traits)
+    return sorted(points.values(), reverse=not bd)[:top_k]
+
+
+@pytest.mark.parametrize(
+    "team_size, bonus_traits, included_units, bd",
+    [
+        (3, None, [], False),
+        (3, None, [], True),
+        (3, {"Frost": 1, "Portal": 1}, [], False),
+        (4, None, ["Ahri"], False),
+        (4, {"Arcana": 1}, ["Ahri"], False),
+        (4, None, ["Ahri"], True),
+    ],
+)
+def test_solve_exact_matches_brute_force(team_size, bonus_traits, included_units, bd):
+    expected = brute_force(team_size, bonus_traits, included_units, bd, TOP_K)
+    results = solve_exact(team_size, bonus_traits, included_units, bd, TOP_K)
+    assert [points for _, points in results] == expected
+    for team, points in results:
+        names = [unit.name for unit in team]
+        assert len(set(names)) == team_size
+        assert set(included_units) <= set(names)
+        assert calculate_points(team, bonus_traits) == points
+    keys = [tuple(sorted(trait_class(unit.name) for unit in team)) for team, _ in results]
+    assert len(set(keys)) == len(keys)  # symmetric teams are returned once
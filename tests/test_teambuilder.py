@@ -0,0 +1,73 @@
+"""
+  Search: teams built by run_search with every operator preset
+"""
+
+import random
+
+import pytest
+
+from scoring import FitnessCache
+from teambuilder import (
+    BATCHED,
+    GUIDED,
+    TOURNAMENT,
+    TRUNCATION,
+    CandidatePool,
+    calculate_points,
+    evolve,
+    generate_random_team,
+    guided_mutate,
+    mutate,
+    run_search,
+    seed_population,
+)
+
+"""
+    Global Variables
+"""
+PRESETS = {"truncation": TRUNCATION, "guided": GUIDED, "tournament": TOURNAMENT, "batched": BATCHED}
+
+
+def test_candidate_pool_drops_repeated_core_units():
+    pool = CandidatePool(["Jinx", "Ahri", "Jinx"], False)
+    assert [unit.name for unit in pool.included] == ["Jinx", "Ahri"]
+    assert [unit.name for unit in pool.core] == ["Jinx", "Ahri"]
+
+
+@pytest.mark.parametrize("operators", PRESETS.values(), ids=PRESETS)
+def test_run_search_with_repeated_core_units(operators):
+    random.seed(1)
+    result = run_search(
+        20, 100, None, ["Jinx", "Jinx"], team_size=8, operators=operators, verbose=False
+    )
+    names = [unit.name for unit in result.team]
+    assert len(names) == len(set(names)) == 8
+    assert "Jinx" in names
+    assert result.points == calculate_points(result.team, None)
+
+
+
+@pytest.mark.parametrize("mutate", [mutate, guided_mutate])
+def test_mutate_leaves_out_core_units_built_different_excludes(mutate):
+    random.seed(2)
+    pool = CandidatePool(["Ahri", "Wukong"], True)  # Wukong has a unique trait
+    for _ in range(100):
+        team = mutate(generate_random_team(None, True, 7, pool), ["Ahri", "Wukong"], True, pool, 1.0)
+        names = [unit.name for unit in team]
+        assert len(names) == len(set(names)) == 7
+        assert "Ahri" in names and "Wukong" not in names
+
+
+@pytest.mark.parametrize("operators", [TRUNCATION, GUIDED, TOURNAMENT], ids=["truncation", "guided", "tournament"])
+def test_fitness_cache_does_not_change_the_search(operators):
+    populations = []
+    for cache in (None, FitnessCache()):
+        random.seed(3)
+        pool = CandidatePool(["Ahri"], False)
+        initial = seed_population(60, ["Ahri"], False, 9, pool, {"Frost": 1})
+        final, _, _ = evolve(
+            initial, 30, 60, {"Frost": 1}, ["Ahri"], False, pool=pool, operators=operators, cache=cache
+        )
+        populations.append([[unit.name for unit in team] for team in final])
+    assert populations[0] == populations[1]
+    assert cache.hits > 0